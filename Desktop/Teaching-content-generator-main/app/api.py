@@ -1,22 +1,54 @@
-from flask import Flask, Blueprint, jsonify
+from flask import Flask, Blueprint, Response, jsonify
 import app.config as cfg
+from app.routes.plan_routes import plan_bp
+from app.routes.content_routes import content_bp
+from app.routes.job_routes import job_bp
+from app.routes.ingest_routes import ingest_bp
+from app.services import embedding_store, llm_cache, metrics, model_registry
 
 api_bp = Blueprint("api", __name__)
 
 @api_bp.get("/health")
 def health():
+    models = model_registry.status()
     return jsonify({
         "ok": True,
+        "ready": models["ready"],
+        "models": models,
         "llm_provider": cfg.LLM_PROVIDER,
         "llm_model": cfg.LLM_MODEL_NAME,
         "embedding_model": cfg.EMBEDDING_MODEL_NAME,
+        "embedding_backend": cfg.EMBEDDING_BACKEND,
         "vector_index": cfg.VECTOR_DB_NAME,
         "top_k": cfg.TOP_K,
         "chunk": {"size": cfg.CHUNK_SIZE, "overlap": cfg.CHUNK_OVERLAP},
+        "embedding_cache": embedding_store.stats(),
+        "llm_cache": llm_cache.stats(),
     })
 
+@api_bp.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 def create_app() -> Flask:
+    if cfg.PRELOAD_MODELS:
+        model_registry.warm_up(background=False)  # before workers fork: shared copy-on-write
+
     app = Flask(__name__)
     app.config["JSON_SORT_KEYS"] = False
     app.register_blueprint(api_bp, url_prefix="/api")
+    app.register_blueprint(plan_bp, url_prefix="/api/plan")
+    app.register_blueprint(content_bp, url_prefix="/api/content")
+    app.register_blueprint(job_bp, url_prefix="/api/jobs")
+    app.register_blueprint(ingest_bp, url_prefix="/api/ingest")
+    metrics.init_app(app)
+
+    if cfg.WARMUP_MODELS and not cfg.PRELOAD_MODELS:
+        # Start the background load in the process that serves requests, never in a
+        # gunicorn --preload master: a thread alive across fork() can leave a lock
+        # held in every worker. warm_up() is a no-op after the first call.
+        @app.before_request
+        def _warm_up_models():
+            model_registry.warm_up(background=True)
+
     return app
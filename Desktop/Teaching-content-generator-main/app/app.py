@@ -1,12 +1,13 @@
-from flask import Flask
-from routes.plan_routes import plan_bp
-from routes.content_routes import content_bp
+import os
+import sys
 
-app = Flask(__name__)
+if __package__ in (None, ""):
+    # run as `python app/app.py`: import the `app` package from the project root, not this file
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-# Register Blueprints
-app.register_blueprint(plan_bp, url_prefix="/api/plan")
-app.register_blueprint(content_bp, url_prefix="/api/content")
+from app.api import create_app
+
+app = create_app()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -12,6 +12,20 @@ LLM_MODEL_NAME = "gemini-1.5-flash"
 
 # Embeddings (local + free)
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"  # SentenceTransformers
+# Inference backend: "torch" (reference) | "onnx" | "onnx-int8" (dynamic int8 quantization, CPU)
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_QUANT_CONFIG = os.environ.get("EMBEDDING_QUANT_CONFIG", "avx2")  # "avx2" | "avx512" | "avx512_vnni" | "arm64"
+EMBED_BATCH_TOKEN_BUDGET = int(os.environ.get("EMBED_BATCH_TOKEN_BUDGET", str(64 * 256)))  # items x longest item (tokens)
+# Multi-process embedding for large inputs (backfills)
+EMBED_POOL_ENABLED = os.environ.get("EMBED_POOL_ENABLED", "true").lower() in ("1", "true", "yes", "y")
+EMBED_POOL_WORKERS = int(os.environ.get("EMBED_POOL_WORKERS", "0"))  # 0 = half the cores
+EMBED_POOL_MIN_TEXTS = int(os.environ.get("EMBED_POOL_MIN_TEXTS", "2000"))
+EMBED_POOL_START_METHOD = os.environ.get("EMBED_POOL_START_METHOD", "spawn")
+# Model loading: warm up in the background on each process's first request; or load
+# synchronously in create_app (PRELOAD_MODELS) so a pre-forking server (gunicorn
+# --preload) shares them. Use PRELOAD_MODELS whenever the app is created before a fork.
+WARMUP_MODELS = os.environ.get("WARMUP_MODELS", "true").lower() in ("1", "true", "yes", "y")
+PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS", "false").lower() in ("1", "true", "yes", "y")
 
 # ==== Paths ====
 DATA_PATH = "data/"
@@ -25,19 +39,85 @@ CHUNK_MIN = 600
 CHUNK_MAX = 1000
 # Tokenizer used for chunk sizing (approx for Gemini; perfect for OpenAI)
 TOKENIZER = "o200k_base"  # fallbacks to cl100k_base if unavailable
+CHUNKER = os.environ.get("CHUNKER", "offsets")  # "offsets" (single tokenization) | "recursive" (LangChain)
+
+# ==== Generation ====
+SLIDE_WORKERS = int(os.environ.get("SLIDE_WORKERS", "8"))  # concurrent per-slide LLM calls
+
+# Retrieved context is merged/de-duplicated and packed into a token budget per model
+CONTEXT_TOKEN_BUDGETS = {"gemini-1.5-flash": 3000, "gemini-1.5-pro": 6000}
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "0"))  # 0 = CONTEXT_TOKEN_BUDGETS / 3000
+SLIDE_CONTEXT_TOKEN_BUDGET = int(os.environ.get("SLIDE_CONTEXT_TOKEN_BUDGET", "1200"))  # per-slide prompts
+
+# LLM response cache (exact prompt hash + semantic topic match per video)
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "y")
+LLM_SEMANTIC_CACHE_ENABLED = os.environ.get("LLM_SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "y")
+LLM_SEMANTIC_THRESHOLD = float(os.environ.get("LLM_SEMANTIC_THRESHOLD", "0.92"))  # cosine on MiniLM topic embeddings
+LLM_SEMANTIC_MAX_PER_VIDEO = int(os.environ.get("LLM_SEMANTIC_MAX_PER_VIDEO", "64"))
+LLM_CACHE_MAX_MB = int(os.environ.get("LLM_CACHE_MAX_MB", "64"))
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds; 0 = never expire
+
+# ==== Background jobs ====
+JOB_BACKEND = os.environ.get("JOB_BACKEND", "memory")  # "memory" | "sqlite" (shared across workers)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", "100"))
+JOB_RESULT_TTL = int(os.environ.get("JOB_RESULT_TTL", "3600"))  # seconds to keep finished jobs; 0 = forever
+
+# ==== Bulk ingestion ====
+INGEST_FETCH_WORKERS = int(os.environ.get("INGEST_FETCH_WORKERS", "8"))      # transcript fetch / translate threads
+INGEST_CHUNK_PROCESSES = int(os.environ.get("INGEST_CHUNK_PROCESSES", "0"))  # 0 = chunk in-process
+INGEST_EMBED_VIDEOS = int(os.environ.get("INGEST_EMBED_VIDEOS", "8"))        # videos batched per encode
+INGEST_UPSERT_WORKERS = int(os.environ.get("INGEST_UPSERT_WORKERS", "4"))
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", "16"))           # bound between stages
 
 # ==== Retrieval ====
 TOP_K = 8
-USE_MMR = False
-MMR_LAMBDA = 0.5
+USE_MMR = os.environ.get("USE_MMR", "false").lower() in ("1", "true", "yes", "y")
+MMR_LAMBDA = float(os.environ.get("MMR_LAMBDA", "0.5"))  # 1.0 = pure relevance, 0.0 = pure diversity
+MMR_FETCH_MULTIPLIER = int(os.environ.get("MMR_FETCH_MULTIPLIER", "4"))  # candidates = TOP_K * this
+
+# Hybrid retrieval: BM25 (lexical) + dense, combined by reciprocal-rank fusion
+HYBRID_SEARCH = os.environ.get("HYBRID_SEARCH", "true").lower() in ("1", "true", "yes", "y")
+HYBRID_CANDIDATES = int(os.environ.get("HYBRID_CANDIDATES", "4"))  # per-ranker candidates = TOP_K * this
+RRF_K = int(os.environ.get("RRF_K", "60"))
+HYBRID_PREFILTER_MIN_ROWS = int(os.environ.get("HYBRID_PREFILTER_MIN_ROWS", "20000"))  # multi-video: BM25 shortlist above this
+HYBRID_PREFILTER_SIZE = int(os.environ.get("HYBRID_PREFILTER_SIZE", "512"))  # rows scored densely after the prefilter
 
 # ==== Translation (LibreTranslate) ====
 LT_URL = os.environ.get("LT_URL", "https://libretranslate.com")
 LT_API_KEY = os.environ.get("LT_API_KEY", "")
 PREFERRED_LANGUAGE = "en"  # always prefer English
+LT_TIMEOUT = float(os.environ.get("LT_TIMEOUT", "60"))
+LT_MAX_CONCURRENCY = int(os.environ.get("LT_MAX_CONCURRENCY", "4"))  # pieces in flight per call
+LT_MAX_RETRIES = int(os.environ.get("LT_MAX_RETRIES", "4"))         # on 429 / 5xx / connection errors
+LT_BACKOFF_BASE = float(os.environ.get("LT_BACKOFF_BASE", "0.5"))   # seconds, doubled per attempt
+LT_BACKOFF_MAX = float(os.environ.get("LT_BACKOFF_MAX", "30"))
+TRANSLATION_CACHE_ENABLED = os.environ.get("TRANSLATION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "y")
+TRANSLATION_CACHE_MAX_MB = int(os.environ.get("TRANSLATION_CACHE_MAX_MB", "256"))
 
 # Pinecone serverless location (edit if needed)
 PINECONE_CLOUD = os.environ.get("PINECONE_CLOUD", "aws")
 PINECONE_REGION = os.environ.get("PINECONE_REGION", "us-east-1")
 PINECONE_METRIC = "cosine"  # already used; keep as-is
 
+# ==== Vector store ====
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "pinecone")  # "pinecone" | "local"
+LOCAL_ANN = os.environ.get("LOCAL_ANN", "true").lower() in ("1", "true", "yes", "y")
+LOCAL_ANN_MIN_VECTORS = int(os.environ.get("LOCAL_ANN_MIN_VECTORS", "50000"))  # exact search below this
+LOCAL_ANN_NPROBE = int(os.environ.get("LOCAL_ANN_NPROBE", "8"))
+VECTOR_QUERY_CONCURRENCY = int(os.environ.get("VECTOR_QUERY_CONCURRENCY", "8"))  # parallel queries per batch (Pinecone)
+
+# ==== Caching ====
+CACHE_PATH = os.environ.get("CACHE_PATH", ".cache/")
+TRANSCRIPT_CACHE_ENABLED = os.environ.get("TRANSCRIPT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "y")
+TRANSCRIPT_CACHE_MAX_MB = int(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", "256"))
+TRANSCRIPT_CACHE_TTL = int(os.environ.get("TRANSCRIPT_CACHE_TTL", "0"))  # seconds; 0 = never expire
+RETRIEVAL_CACHE_SIZE = int(os.environ.get("RETRIEVAL_CACHE_SIZE", "32"))  # per-video indexes kept in memory
+
+# Coalescing of concurrent work on the same video (threads + processes via file locks)
+SINGLEFLIGHT_ENABLED = os.environ.get("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes", "y")
+SINGLEFLIGHT_TIMEOUT = float(os.environ.get("SINGLEFLIGHT_TIMEOUT", "600"))  # max wait for another leader, seconds
+
+# ==== Observability ====
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "y")
+METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "true").lower() in ("1", "true", "yes", "y")  # per-request header
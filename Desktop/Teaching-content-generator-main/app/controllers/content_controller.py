@@ -1,6 +1,9 @@
-from flask import request, jsonify
-from services.llm_service import generate_content_from_plan
-from services.rag_service import retrieve_relevant_context
+import json
+from flask import request, jsonify, Response, stream_with_context
+import app.config as cfg
+from app.services.llm_service import generate_content_from_plan, stream_content_from_plan, iter_slide_events
+from app.services.rag_service import retrieve_across, retrieve_relevant_context
+from app.services.slide_generator import generate_slides_parallel
 
 def generate_content_controller():
     try:
@@ -12,6 +15,10 @@ def generate_content_controller():
         if not all([topic, plan, yt_link]):
             return jsonify({"error": "Missing topic, plan or youtube_link"}), 400
 
+        if data.get("mode") == "per_slide":
+            # one retrieval + one LLM call per slide, run concurrently
+            return jsonify({"slides": generate_slides_parallel(topic, plan, yt_link)})
+
         # get transcript context
         context = retrieve_relevant_context(yt_link, topic)
         # generate LLM content
@@ -19,3 +26,66 @@ def generate_content_controller():
         return jsonify({"slides": content})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+def search_content_controller():
+    """Top chunks for a query across several videos: {"query", "youtube_links": [...], "top_k"?}."""
+    try:
+        data = request.get_json() or {}
+        query = data.get("query")
+        links = data.get("youtube_links")
+
+        if not query or not links or not isinstance(links, list):
+            return jsonify({"error": "Missing query or youtube_links (list)"}), 400
+
+        top_k = int(data.get("top_k") or cfg.TOP_K)
+        return jsonify({"matches": retrieve_across(links, query, top_k=top_k)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_content_controller():
+    """
+    Server-Sent Events variant of generate_content_controller:
+      event: delta  -> {"text": "..."} partial model output
+      event: slide  -> {"index": n, "text": "..."} each completed slide
+      event: done   -> {"slides": n}
+      event: error  -> {"error": "..."}
+    """
+    try:
+        data = request.get_json()
+        topic = data.get("topic")
+        plan = data.get("plan")
+        yt_link = data.get("youtube_link")
+
+        if not all([topic, plan, yt_link]):
+            return jsonify({"error": "Missing topic, plan or youtube_link"}), 400
+
+        # retrieval happens before the stream opens so its errors stay plain JSON
+        context = retrieve_relevant_context(yt_link, topic)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    def events():
+        count = 0
+        try:
+            for kind, payload in iter_slide_events(stream_content_from_plan(topic, plan, context)):
+                if kind == "delta":
+                    yield _sse("delta", {"text": payload})
+                else:
+                    count += 1
+                    yield _sse("slide", payload)
+            yield _sse("done", {"slides": count})
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
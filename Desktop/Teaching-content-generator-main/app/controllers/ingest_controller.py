@@ -0,0 +1,33 @@
+from flask import request, jsonify, url_for
+from app.services.ingest import ingest_videos
+from app.services.jobs import get_queue, QueueFull
+
+def _ingest_job(data, report):
+    progress = {}
+
+    def on_progress(video_id, state):
+        progress[video_id] = state
+        report({"videos": dict(progress)})
+
+    incremental = data.get("incremental", True)
+    return {"videos": ingest_videos(data["videos"], on_progress=on_progress, incremental=incremental)}
+
+def ingest_controller():
+    try:
+        data = request.get_json() or {}
+        videos = data.get("videos")
+        if not videos or not isinstance(videos, list):
+            return jsonify({"error": "Missing videos (list of ids or urls)"}), 400
+
+        q = get_queue()
+        q.register("ingest", _ingest_job)
+        job_id = q.submit("ingest", {"videos": videos, "incremental": bool(data.get("incremental", True))})
+        return jsonify({
+            "job_id": job_id,
+            "status_url": url_for("job_bp.job_status", job_id=job_id),
+            "result_url": url_for("job_bp.job_result", job_id=job_id),
+        }), 202
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
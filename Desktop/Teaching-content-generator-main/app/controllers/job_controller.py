@@ -0,0 +1,69 @@
+from flask import request, jsonify, url_for
+from app.services.jobs import get_queue, QueueFull, SUCCEEDED, FAILED
+from app.services.llm_service import generate_plan_from_llm, generate_content_from_plan
+from app.services.rag_service import retrieve_relevant_context
+from app.services.slide_generator import generate_slides_parallel
+
+# --- Job handlers (same pipelines as the synchronous controllers) -----------------
+
+def _plan_job(data, report):
+    report({"stage": "llm"})
+    return {"plan": generate_plan_from_llm(data["topic"], data["youtube_link"])}
+
+def _content_job(data, report):
+    topic, plan, yt_link = data["topic"], data["plan"], data["youtube_link"]
+    if data.get("mode") == "per_slide":
+        report({"stage": "slides"})
+        return {"slides": generate_slides_parallel(topic, plan, yt_link)}
+    report({"stage": "retrieval"})
+    context = retrieve_relevant_context(yt_link, topic)
+    report({"stage": "llm"})
+    return {"slides": generate_content_from_plan(topic, plan, context)}
+
+_REQUIRED = {
+    "plan": ("topic", "youtube_link"),
+    "content": ("topic", "plan", "youtube_link"),
+}
+
+def _queue():
+    q = get_queue()
+    q.register("plan", _plan_job)
+    q.register("content", _content_job)
+    return q
+
+# --- Controllers ----------------------------------------------------------------
+
+def submit_job_controller(kind):
+    try:
+        data = request.get_json() or {}
+        missing = [f for f in _REQUIRED[kind] if not data.get(f)]
+        if missing:
+            return jsonify({"error": f"Missing {', '.join(missing)}"}), 400
+
+        job_id = _queue().submit(kind, data)
+        return jsonify({
+            "job_id": job_id,
+            "status_url": url_for("job_bp.job_status", job_id=job_id),
+            "result_url": url_for("job_bp.job_result", job_id=job_id),
+        }), 202
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def job_status_controller(job_id):
+    job = _queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    job.pop("result", None)
+    return jsonify(job)
+
+def job_result_controller(job_id):
+    job = _queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    if job["status"] == SUCCEEDED:
+        return jsonify(job["result"])
+    if job["status"] == FAILED:
+        return jsonify({"error": job.get("error")}), 500
+    return jsonify({"status": job["status"], "progress": job.get("progress")}), 202
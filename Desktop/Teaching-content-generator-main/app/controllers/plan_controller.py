@@ -1,5 +1,5 @@
 from flask import request, jsonify
-from services.llm_service import generate_plan_from_llm
+from app.services.llm_service import generate_plan_from_llm
 
 def generate_plan_controller():
     try:
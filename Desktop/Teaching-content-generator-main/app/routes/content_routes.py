@@ -1,8 +1,20 @@
 from flask import Blueprint
-from controllers.content_controller import generate_content_controller
+from app.controllers.content_controller import (
+    generate_content_controller,
+    search_content_controller,
+    stream_content_controller,
+)
 
 content_bp = Blueprint("content_bp", __name__)
 
 @content_bp.route("/generate", methods=["POST"])
 def generate_content():
     return generate_content_controller()
+
+@content_bp.route("/generate/stream", methods=["POST"])
+def generate_content_stream():
+    return stream_content_controller()
+
+@content_bp.route("/search", methods=["POST"])
+def search_content():
+    return search_content_controller()
@@ -0,0 +1,8 @@
+from flask import Blueprint
+from app.controllers.ingest_controller import ingest_controller
+
+ingest_bp = Blueprint("ingest_bp", __name__)
+
+@ingest_bp.route("", methods=["POST"])
+def ingest():
+    return ingest_controller()
@@ -0,0 +1,20 @@
+from flask import Blueprint
+from app.controllers.job_controller import submit_job_controller, job_status_controller, job_result_controller
+
+job_bp = Blueprint("job_bp", __name__)
+
+@job_bp.route("/plan", methods=["POST"])
+def submit_plan_job():
+    return submit_job_controller("plan")
+
+@job_bp.route("/content", methods=["POST"])
+def submit_content_job():
+    return submit_job_controller("content")
+
+@job_bp.route("/<job_id>", methods=["GET"])
+def job_status(job_id):
+    return job_status_controller(job_id)
+
+@job_bp.route("/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    return job_result_controller(job_id)
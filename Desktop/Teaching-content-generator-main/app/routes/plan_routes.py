@@ -1,5 +1,5 @@
 from flask import Blueprint
-from controllers.plan_controller import generate_plan_controller
+from app.controllers.plan_controller import generate_plan_controller
 
 plan_bp = Blueprint("plan_bp", __name__)
 
@@ -0,0 +1,153 @@
+from __future__ import annotations
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+import app.config as cfg
+
+# Per-video BM25 inverted index over chunk texts, stored as CSR arrays:
+#   terms    (V,) sorted vocabulary (term id = position)
+#   indptr   (V + 1,) int64: postings of term t are [indptr[t], indptr[t + 1])
+#   docs     (nnz,) int32 chunk rows, ascending within each term
+#   tfs      (nnz,) float32 term frequency of the term in that chunk
+#   doc_len  (N,) float32 chunk lengths in terms
+# Scoring a query touches only the postings of its terms. Tokens are lowercased
+# \w+ runs, so identifiers (learning_rate), acronyms and numbers match exactly.
+
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, terms: np.ndarray, indptr: np.ndarray, docs: np.ndarray, tfs: np.ndarray, doc_len: np.ndarray):
+        self.terms = terms
+        self.indptr = indptr
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self._vocab: Dict[str, int] = {t: i for i, t in enumerate(terms.tolist())}
+        n = len(doc_len)
+        df = np.diff(indptr).astype(np.float32)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(doc_len.mean()) if n else 0.0
+        # per-row length normalization, precomputed once
+        self._norm = (K1 * (1 - B + B * doc_len / avgdl)).astype(np.float32) if avgdl else np.full(n, K1, np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, texts: Sequence[str]) -> "BM25Index":
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_len[row] = len(tokens)
+            for tok in tokens:
+                p = postings.setdefault(tok, {})
+                p[row] = p.get(row, 0) + 1
+        terms = sorted(postings)
+        counts = np.fromiter((len(postings[t]) for t in terms), dtype=np.int64, count=len(terms))
+        indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        docs = np.empty(int(indptr[-1]), dtype=np.int32)
+        tfs = np.empty(int(indptr[-1]), dtype=np.float32)
+        for t, term in enumerate(terms):
+            p = postings[term]  # rows were inserted in ascending order
+            docs[indptr[t]:indptr[t + 1]] = list(p.keys())
+            tfs[indptr[t]:indptr[t + 1]] = list(p.values())
+        return cls(np.array(terms, dtype=str), indptr, docs, tfs, doc_len)
+
+    def scores(self, query: str) -> np.ndarray:
+        """(N,) float32 BM25 score of every chunk for the query (0 = no term in common)."""
+        out = np.zeros(len(self), dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self._vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.indptr[t], self.indptr[t + 1]
+            rows, tf = self.docs[lo:hi], self.tfs[lo:hi]
+            out[rows] += self.idf[t] * tf * (K1 + 1) / (tf + self._norm[rows])  # rows unique per term
+        return out
+
+    # --- Persist (inside the retrieval index .npz) --------------------------------
+    def to_arrays(self, prefix: str = "bm25_") -> Dict[str, np.ndarray]:
+        return {
+            prefix + "terms": self.terms,
+            prefix + "indptr": self.indptr,
+            prefix + "docs": self.docs,
+            prefix + "tfs": self.tfs,
+            prefix + "doc_len": self.doc_len,
+        }
+
+    @classmethod
+    def from_arrays(cls, data, prefix: str = "bm25_") -> "BM25Index":
+        return cls(*(data[prefix + name] for name in ("terms", "indptr", "docs", "tfs", "doc_len")))
+
+
+class BM25Corpus:
+    """
+    Row ranges of several BM25Index scored as one corpus: IDF and average chunk
+    length come from all parts together, so scores compare across videos. Reuses
+    the per-video postings (nothing is re-tokenized); rows are numbered part by part.
+    """
+
+    def __init__(self, parts: Sequence[Tuple[BM25Index, int, int]]):
+        self.parts = list(parts)  # (index, first row, end row)
+        sizes = [hi - lo for _, lo, hi in self.parts]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        n = int(self.offsets[-1])
+        total = sum(float(ix.doc_len[lo:hi].sum()) for ix, lo, hi in self.parts)
+        avgdl = total / n if n else 0.0
+        self._norms = [
+            (K1 * (1 - B + B * ix.doc_len / avgdl)).astype(np.float32) if avgdl else np.full(len(ix), K1, np.float32)
+            for ix, _, _ in self.parts
+        ]
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def scores(self, query: str) -> np.ndarray:
+        """(N,) float32 BM25 score of every row in the corpus (0 = no term in common)."""
+        n = len(self)
+        out = np.zeros(n, dtype=np.float32)
+        for term in set(tokenize(query)):
+            postings = []
+            for p, (ix, lo, hi) in enumerate(self.parts):
+                t = ix._vocab.get(term)
+                if t is None:
+                    continue
+                docs = ix.docs[ix.indptr[t]:ix.indptr[t + 1]]
+                a, b = np.searchsorted(docs, [lo, hi])  # postings are ascending by row
+                if b > a:
+                    postings.append((p, ix.indptr[t] + a, ix.indptr[t] + b))
+            df = sum(b - a for _, a, b in postings)
+            if not df:
+                continue
+            idf = np.float32(np.log1p((n - df + 0.5) / (df + 0.5)))
+            for p, a, b in postings:
+                ix, lo, _ = self.parts[p]
+                rows, tf = ix.docs[a:b], ix.tfs[a:b]
+                out[self.offsets[p] + rows - lo] += idf * tf * (K1 + 1) / (tf + self._norms[p][rows])
+        return out
+
+
+def rrf(rankings: Sequence[np.ndarray], k: int = cfg.RRF_K) -> List[tuple]:
+    """
+    Reciprocal-rank fusion: score(row) = sum over rankings of 1 / (k + rank).
+    rankings: row arrays, best first. Returns [(row, fused score), ...] best first.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking.tolist()):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda rs: -rs[1])
+
+
+__all__ = ["BM25Index", "BM25Corpus", "tokenize", "rrf"]
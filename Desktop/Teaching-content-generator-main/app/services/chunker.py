@@ -1,30 +1,20 @@
+import bisect
 import hashlib
 import re
-from typing import List, Dict, Callable
-
-import tiktoken
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import List, Dict, Callable, Optional, Tuple
 
 import app.config as cfg
+from app.services import metrics, model_registry
 
 # --- Tokenizer ---------------------------------------------------------------
 
-# Use a tokenizer compatible with your embedding/LLM models.
-# (o200k_base works well with GPT-4o/Emb-3; fallback to cl100k_base if unavailable)
+# The tiktoken encoding is loaded lazily (once per process) by the model registry.
 def _get_encoding():
-    for name in (cfg.__dict__.get("TOKENIZER") or "", "o200k_base", "cl100k_base"):
-        try:
-            return tiktoken.get_encoding(name)
-        except Exception:
-            continue
-    # absolute fallback
-    return tiktoken.get_encoding("cl100k_base")
-
-_encoding = _get_encoding()
+    return model_registry.get_tokenizer()
 
 def count_tokens(text: str) -> int:
     """Count tokens using the chosen tiktoken encoding."""
-    return len(_encoding.encode(text))
+    return len(_get_encoding().encode(text))
 
 # --- Normalization -----------------------------------------------------------
 
@@ -48,11 +38,13 @@ def chunk_id(text: str) -> str:
 
 # --- Splitter ----------------------------------------------------------------
 
-def _build_splitter(length_fn: Callable[[str], int]) -> RecursiveCharacterTextSplitter:
+def _build_splitter(length_fn: Callable[[str], int]):
     """
     Recursive splitter that prefers larger semantic boundaries first
     and falls back to smaller units. We use token-based sizes.
     """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     separators = [
         "\n\n",  # paragraphs
         "\n",    # lines
@@ -73,10 +65,13 @@ def _build_splitter(length_fn: Callable[[str], int]) -> RecursiveCharacterTextSp
     )
 
 
-def make_chunks(transcript_text: str) -> List[Dict[str, str]]:
+def make_chunks_recursive(transcript_text: str) -> List[Dict]:
     """
-    Split full transcript text into token-aware chunks with overlap.
-    Returns: [{"id": "...", "text": "..."}, ...]
+    Reference implementation: LangChain recursive splitter with count_tokens as
+    length function (re-tokenizes overlapping substrings; kept for comparison).
+    Returns: [{"id": "...", "text": "...", "start": 0, "end": 3120}, ...]
+    (start/end are located by search, and omitted for a merged tail that no longer
+    appears verbatim in the normalized text)
     """
     clean = normalize_text(transcript_text)
     if not clean:
@@ -100,16 +95,126 @@ def make_chunks(transcript_text: str) -> List[Dict[str, str]]:
             parts[-2] = (prev + " " + last).strip()
             parts.pop()
 
-    # Materialize final chunks with deterministic IDs
-    chunks: List[Dict[str, str]] = []
-    for p in parts:
+    return _materialize(parts, source=clean)
+
+# --- Token-offset chunker ----------------------------------------------------
+
+def _token_boundaries(text: str, offsets: List[int]) -> Tuple[List[int], List[int]]:
+    """
+    Map sentence and word boundaries onto token indices.
+    Token t is a word boundary if it starts at a space (tiktoken keeps the
+    leading space on word tokens), and a sentence boundary if that space
+    follows . ! or ?. A chunk may end right before such a token.
+    """
+    words: List[int] = []
+    sentences: List[int] = []
+    for t, off in enumerate(offsets):
+        if off <= 0 or off >= len(text) or text[off] != " ":
+            continue
+        words.append(t)
+        if text[off - 1] in ".!?":
+            sentences.append(t)
+    return sentences, words
+
+def _last_boundary(bounds: List[int], lo: int, hi: int) -> int:
+    """Largest boundary b with lo < b <= hi, or -1."""
+    i = bisect.bisect_right(bounds, hi) - 1
+    return bounds[i] if i >= 0 and bounds[i] > lo else -1
+
+def _first_boundary(bounds: List[int], lo: int, hi: int) -> int:
+    """Smallest boundary b with lo <= b < hi, or -1."""
+    i = bisect.bisect_left(bounds, lo)
+    return bounds[i] if i < len(bounds) and bounds[i] < hi else -1
+
+def _token_spans(n_tokens: int, sentences: List[int], words: List[int]) -> List[Tuple[int, int]]:
+    """
+    Pick [start, end) token spans of at most CHUNK_SIZE tokens, preferring to end
+    on a sentence boundary, then a word boundary, in the back half of the window.
+    Consecutive spans overlap by ~CHUNK_OVERLAP tokens, starting on a word.
+    """
+    size, overlap = cfg.CHUNK_SIZE, cfg.CHUNK_OVERLAP
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while start < n_tokens:
+        limit = start + size
+        if limit >= n_tokens:
+            spans.append((start, n_tokens))
+            break
+        floor = start + size // 2
+        end = _last_boundary(sentences, floor, limit)
+        if end < 0:
+            end = _last_boundary(words, floor, limit)
+        if end < 0:
+            end = limit  # no boundary: hard cut (last resort, like the "" separator)
+        spans.append((start, end))
+
+        nxt = end - overlap
+        snapped = _first_boundary(words, nxt, end)
+        nxt = snapped if snapped > 0 else nxt
+        start = max(nxt, start + 1)
+    return spans
+
+@metrics.timed("chunk")
+def make_chunks(transcript_text: str) -> List[Dict]:
+    """
+    Split full transcript text into token-aware chunks with overlap.
+    The normalized text is tokenized once; chunk boundaries are chosen on the
+    token array using precomputed sentence/word boundary -> token index maps.
+    Returns: [{"id": "...", "text": "...", "start": 0, "end": 3120}, ...]
+    where text == normalize_text(transcript_text)[start:end].
+    """
+    clean = normalize_text(transcript_text)
+    if not clean:
+        return []
+    if getattr(cfg, "CHUNKER", "offsets") == "recursive":
+        return make_chunks_recursive(clean)
+
+    encoding = _get_encoding()
+    tokens = encoding.encode(clean)
+    metrics.inc("chunked_tokens_total", len(tokens))
+    _, offsets = encoding.decode_with_offsets(tokens)
+    sentences, words = _token_boundaries(clean, offsets)
+    spans = _token_spans(len(tokens), sentences, words)
+
+    # Tail handling (same rule as the recursive splitter, on known token counts):
+    # absorb a too-small last chunk into the previous one if it stays under CHUNK_MAX.
+    min_tokens = getattr(cfg, "CHUNK_MIN", None)
+    max_tokens = getattr(cfg, "CHUNK_MAX", None)
+    if len(spans) >= 2 and min_tokens is not None and max_tokens is not None:
+        (ps, pe), (ls, le) = spans[-2], spans[-1]
+        if le - ls < min_tokens and (pe - ps) + (le - ls) <= max_tokens:
+            spans[-2:] = [(ps, le)]
+
+    def char_at(t: int) -> int:
+        return offsets[t] if t < len(offsets) else len(clean)
+
+    metrics.observe("chunks_per_transcript", len(spans))
+    char_spans = [(char_at(s), char_at(e)) for s, e in spans]
+    return _materialize([clean[a:b] for a, b in char_spans], char_spans)
+
+def _materialize(parts: List[str], char_spans: Optional[List[Tuple[int, int]]] = None, source: str = "") -> List[Dict]:
+    """
+    Final chunks with deterministic IDs (empty parts dropped) and the char span
+    of the stripped text in the normalized transcript. Without char_spans the
+    parts are located in `source` left to right.
+    """
+    chunks: List[Dict] = []
+    cursor = 0
+    for i, p in enumerate(parts):
         txt = p.strip()
         if not txt:
             continue
-        chunks.append({"id": chunk_id(txt), "text": txt})
-
+        chunk = {"id": chunk_id(txt), "text": txt}
+        if char_spans is not None:
+            start = char_spans[i][0] + (len(p) - len(p.lstrip()))
+        else:
+            start = source.find(txt, cursor) if source else -1
+        if start >= 0:
+            chunk["start"], chunk["end"] = start, start + len(txt)
+            cursor = start + 1
+        chunks.append(chunk)
     return chunks
 
 # --- Public API --------------------------------------------------------------
 
-__all__ = ["count_tokens", "normalize_text", "make_chunks"]
+__all__ = ["count_tokens", "normalize_text", "make_chunks", "make_chunks_recursive"]
@@ -0,0 +1,154 @@
+from __future__ import annotations
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import app.config as cfg
+from app.services import metrics, model_registry
+from app.services.chunker import count_tokens
+
+# Turns ranked retrieval hits into prompt context:
+#   1. hits whose char spans overlap or touch are stitched into one contiguous span
+#      (the overlapping text is kept once)
+#   2. spans are taken in score order (span score = best member) while they fit
+#      the token budget; a first span larger than the budget is trimmed to a
+#      window around its best member (never cut from the front blindly)
+#   3. selected spans are emitted in transcript order, separated by blank lines
+# Hits without span info (e.g. from an older index) are kept as standalone spans;
+# exact duplicate texts are dropped.
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    raw_tokens: int                 # tokens of the naive "\n".join of all hits
+    spans: List[Tuple[int, int]] = field(default_factory=list)  # char spans used ((-1, -1) if unknown)
+    dropped: int = 0                # merged spans that did not fit the budget
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.raw_tokens - self.tokens)
+
+
+@dataclass
+class _Span:
+    start: int
+    end: int
+    text: str
+    score: float
+    best: Tuple[int, int] = (-1, -1)  # char span of the top-scoring member
+
+
+def context_budget(model: Optional[str] = None) -> int:
+    """Token budget for retrieved context in prompts to `model` (default: LLM_MODEL_NAME)."""
+    if cfg.CONTEXT_TOKEN_BUDGET > 0:
+        return cfg.CONTEXT_TOKEN_BUDGET
+    return cfg.CONTEXT_TOKEN_BUDGETS.get(model or cfg.LLM_MODEL_NAME, 3000)
+
+
+def _merge(hits: List[Dict[str, Any]]) -> List[_Span]:
+    positioned = sorted((h for h in hits if h.get("start", -1) >= 0), key=lambda h: h["start"])
+    spans: List[_Span] = []
+    for h in positioned:
+        cur = spans[-1] if spans else None
+        # touching = only the single space normalize_text leaves between chunks
+        if cur is not None and h["start"] <= cur.end + 1:
+            if h["end"] > cur.end:
+                tail = h["text"][cur.end - h["start"]:] if h["start"] <= cur.end else " " + h["text"]
+                cur.text += tail
+                cur.end = h["end"]
+            if h["score"] > cur.score:
+                cur.score = h["score"]
+                cur.best = (h["start"], h["end"])
+        else:
+            spans.append(_Span(h["start"], h["end"], h["text"], h["score"], (h["start"], h["end"])))
+
+    seen = {s.text for s in spans}
+    for h in hits:
+        if h.get("start", -1) < 0 and h["text"] not in seen:
+            seen.add(h["text"])
+            spans.append(_Span(-1, -1, h["text"], h["score"]))
+    return spans
+
+
+def _truncate(span: _Span, max_tokens: int) -> _Span:
+    """
+    Trim `span` to at most max_tokens, keeping a window centred on its best member
+    (cut at word boundaries). The result's start/end are the trimmed char span.
+    """
+    text = span.text
+    encoding = model_registry.get_tokenizer()
+    tokens = encoding.encode(text)
+    n = len(tokens)
+    if n <= max_tokens:
+        return span
+    _, offsets = encoding.decode_with_offsets(tokens)
+
+    if span.start >= 0 and span.best[0] >= 0:
+        lo = max(0, bisect_right(offsets, span.best[0] - span.start) - 1)
+        hi = max(lo + 1, bisect_right(offsets, span.best[1] - span.start - 1))
+    else:
+        lo, hi = 0, n
+    if hi - lo >= max_tokens:  # the best member alone is too long: keep its head
+        hi = lo + max_tokens
+    else:  # spread the spare tokens over both sides of the member
+        lo = max(0, lo - (max_tokens - (hi - lo)) // 2)
+        hi = min(n, lo + max_tokens)
+        lo = max(0, hi - max_tokens)
+
+    a = offsets[lo]
+    b = offsets[hi] if hi < n else len(text)
+    if lo > 0:  # drop the partial word at each cut
+        space = text.find(" ", a, b)
+        a = space + 1 if space >= 0 else a
+    if hi < n:
+        space = text.rfind(" ", a, b)
+        b = space if space > a else b
+    if span.start < 0:
+        return _Span(-1, -1, text[a:b], span.score)
+    return _Span(span.start + a, span.start + b, text[a:b], span.score, span.best)
+
+
+def pack_context(hits: List[Dict[str, Any]], budget: Optional[int] = None, separator: str = "\n\n") -> PackedContext:
+    """
+    Pack ranked hits ([{"text", "score", "start"?, "end"?}, ...]) into at most
+    `budget` tokens (default: context_budget()). See module comment for the rules.
+    """
+    budget = context_budget() if budget is None else budget
+    if not hits:
+        return PackedContext("", 0, 0)
+    raw_tokens = count_tokens("\n".join(h["text"] for h in hits))
+
+    merged = _merge(hits)
+    sep_tokens = count_tokens(separator)
+    chosen: List[_Span] = []
+    used = 0
+    dropped = 0
+    for span in sorted(merged, key=lambda s: -s.score):
+        cost = count_tokens(span.text) + (sep_tokens if chosen else 0)
+        if used + cost <= budget:
+            chosen.append(span)
+            used += cost
+        elif not chosen:
+            span = _truncate(span, budget)
+            chosen.append(span)
+            used = count_tokens(span.text)
+        else:
+            dropped += 1
+
+    chosen.sort(key=lambda s: (s.start < 0, s.start))
+    text = separator.join(s.text for s in chosen)
+    packed = PackedContext(
+        text=text,
+        tokens=count_tokens(text),
+        raw_tokens=raw_tokens,
+        spans=[(s.start, s.end) for s in chosen],
+        dropped=dropped,
+    )
+    metrics.observe("context_tokens", packed.tokens)
+    metrics.inc("context_tokens_saved_total", packed.tokens_saved)
+    return packed
+
+
+__all__ = ["PackedContext", "context_budget", "pack_context"]
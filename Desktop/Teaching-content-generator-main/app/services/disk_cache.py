@@ -0,0 +1,110 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Optional, List, Tuple
+
+# Small file-per-entry cache shared by the transcript / translation / LLM caches.
+#  - Values are JSON-serializable objects.
+#  - Writes go to a temp file in the same directory, then os.replace() (atomic),
+#    so several workers can share one directory without locking.
+#  - LRU: a hit touches the file's mtime; eviction removes oldest mtimes first
+#    until the directory is back under max_bytes.
+#  - TTL: entries older than ttl seconds (by creation time) are treated as misses.
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes or None
+        self.ttl = ttl or None
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Paths ----------------------------------------------------------------
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".json")
+
+    # --- Get / Set / Delete ---------------------------------------------------
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if entry.get("key") != key:
+            return None  # sha1 collision (or foreign file); treat as miss
+        if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path, None)  # bump recency for LRU
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        entry = {"key": key, "created": time.time(), "value": value}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+        if self.max_bytes is not None:
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        self._remove(self._path(key))
+
+    def clear(self) -> None:
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    # --- Eviction -------------------------------------------------------------
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        out: List[Tuple[str, float, int]] = []
+        try:
+            it = os.scandir(self.directory)
+        except FileNotFoundError:
+            return out
+        with it:
+            for de in it:
+                if not de.name.endswith(".json"):
+                    continue
+                try:
+                    st = de.stat()
+                except FileNotFoundError:
+                    continue  # removed by another worker
+                out.append((de.path, st.st_mtime, st.st_size))
+        return out
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort(key=lambda e: e[1])  # oldest first
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+__all__ = ["DiskCache"]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+import app.config as cfg
+
+# Process pool for large embedding jobs (backfills / bulk ingest). Workers start
+# once, each loads the model through the registry, and batches are sharded
+# across them; pool.map keeps results in submission order. Used automatically by
+# embeddings.embed_texts above EMBED_POOL_MIN_TEXTS inputs; shut down at exit.
+# Spawned workers import only app.config and app.services.model_registry (the app
+# package __init__ imports nothing), so they start from any entrypoint.
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    if cfg.EMBED_POOL_WORKERS > 0:
+        return cfg.EMBED_POOL_WORKERS
+    return max(1, (os.cpu_count() or 1) // 2)
+
+def should_use(n_texts: int) -> bool:
+    return cfg.EMBED_POOL_ENABLED and pool_size() > 1 and n_texts >= cfg.EMBED_POOL_MIN_TEXTS
+
+
+# --- Worker side ----------------------------------------------------------------------
+def _init_worker(threads: int) -> None:
+    try:
+        import torch
+        torch.set_num_threads(threads)  # don't oversubscribe cores across workers
+    except ImportError:
+        pass
+    from app.services import model_registry
+    model_registry.get_embedding_model()
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    from app.services import model_registry
+    model = model_registry.get_embedding_model()
+    return model.encode(texts, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False)
+
+
+# --- Parent side ----------------------------------------------------------------------
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = pool_size()
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            # spawn: forking a process that already runs torch threads can deadlock
+            ctx = multiprocessing.get_context(cfg.EMBED_POOL_START_METHOD)
+            _pool = ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(threads,))
+        return _pool
+
+def encode_batches(batches: List[List[str]]) -> List[np.ndarray]:
+    """Encode pre-built batches across the worker processes; results in batch order."""
+    return list(_get_pool().map(_encode_batch, batches))
+
+def shutdown(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+atexit.register(shutdown)
+
+
+__all__ = ["pool_size", "should_use", "encode_batches", "shutdown"]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Union
+
+import numpy as np
+
+# Typed container passed from the encoder to the retrieval / vector-store paths:
+# chunk ids and texts plus one contiguous (n, dim) float32 matrix, so vectors
+# are never boxed into Python floats until a client (Pinecone) needs lists.
+
+
+@dataclass
+class EmbeddedChunks:
+    ids: List[str]
+    texts: List[str]
+    vectors: np.ndarray  # (n, dim) float32, row i belongs to ids[i]
+
+    def __post_init__(self) -> None:
+        self.vectors = np.ascontiguousarray(self.vectors, dtype=np.float32)
+        if self.vectors.ndim != 2 or not (len(self.ids) == len(self.texts) == self.vectors.shape[0]):
+            raise ValueError("EmbeddedChunks: ids, texts and vector rows must align")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Dict view per chunk ({"id", "text", "vector"}); vector is a row view, not a copy."""
+        for i, cid in enumerate(self.ids):
+            yield {"id": cid, "text": self.texts[i], "vector": self.vectors[i]}
+
+    def take(self, rows: List[int]) -> "EmbeddedChunks":
+        return EmbeddedChunks([self.ids[r] for r in rows], [self.texts[r] for r in rows], self.vectors[rows])
+
+    @classmethod
+    def empty(cls, dim: int) -> "EmbeddedChunks":
+        return cls([], [], np.empty((0, dim), dtype=np.float32))
+
+
+def as_embedded(chunks: Union[EmbeddedChunks, List[Dict[str, Any]]], dim: int = 0) -> EmbeddedChunks:
+    """
+    Accept either the container or the legacy [{"id", "text", "vector"}] list.
+    dim: width of the (0, dim) matrix returned for an empty legacy list.
+    """
+    if isinstance(chunks, EmbeddedChunks):
+        return chunks
+    if not chunks:
+        return EmbeddedChunks.empty(dim)
+    return EmbeddedChunks(
+        [c["id"] for c in chunks],
+        [c.get("text", "") for c in chunks],
+        np.asarray([c["vector"] for c in chunks], dtype=np.float32),
+    )
+
+
+__all__ = ["EmbeddedChunks", "as_embedded"]
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import app.config as cfg
+
+try:  # cross-process append lock (POSIX); single-process lock only elsewhere
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Content-addressed embedding store: (model name, chunk_id) -> float32 vector.
+# Layout per model directory:
+#   vectors.f32  raw row-major float32 matrix, memory-mapped for reads
+#   ids.txt      one chunk_id per line; line number == row in vectors.f32
+# Both files are append-only, so workers only ever read rows that are complete.
+
+
+class EmbeddingStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._vec_path = os.path.join(directory, "vectors.f32")
+        self._ids_path = os.path.join(directory, "ids.txt")
+        self._lock_path = os.path.join(directory, ".lock")
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._ids_offset = 0
+        self._dim: Optional[int] = None
+        self._mm: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+        with self._lock:
+            self._refresh()
+
+    # --- Internal ---------------------------------------------------------------
+    def _refresh(self) -> None:
+        """Pick up ids appended (possibly by other workers) since the last read."""
+        try:
+            with open(self._ids_path, "rb") as f:
+                f.seek(self._ids_offset)
+                tail = f.read()
+        except FileNotFoundError:
+            return
+        # only consume complete lines
+        end = tail.rfind(b"\n") + 1
+        if end <= 0:
+            return
+        for line in tail[:end].decode("utf-8").splitlines():
+            cid, _, dim = line.partition("\t")
+            if self._dim is None and dim:
+                self._dim = int(dim)
+            self._index.setdefault(cid, len(self._index))
+        self._ids_offset += end
+        self._mm = None  # row count changed; remap lazily
+
+    def _matrix(self) -> np.ndarray:
+        if self._mm is None or self._mm.shape[0] < len(self._index):
+            self._mm = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(len(self._index), self._dim))
+        return self._mm
+
+    # --- Public API -------------------------------------------------------------
+    def lookup(self, ids: Sequence[str]) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Gather stored vectors for ids. Updates hit/miss counters.
+        Returns: (matrix (len(ids), dim) float32 with hit rows filled, or None if nothing hit;
+                  bool hit mask)
+        """
+        with self._lock:
+            if any(i not in self._index for i in ids):
+                self._refresh()
+            rows = np.fromiter((self._index.get(cid, -1) for cid in ids), dtype=np.int64, count=len(ids))
+            hit = rows >= 0
+            n_hit = int(hit.sum())
+            self.hits += n_hit
+            self.misses += len(ids) - n_hit
+            if n_hit == 0:
+                return None, hit
+            out = np.zeros((len(ids), self._dim), dtype=np.float32)
+            out[hit] = self._matrix()[rows[hit]]
+            return out, hit
+
+    def put_many(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Append vectors for ids not already stored."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError("put_many expects one vector row per id")
+        with self._lock, open(self._lock_path, "a") as lockf:
+            if fcntl is not None:
+                fcntl.flock(lockf, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                if self._dim is not None and vectors.shape[1] != self._dim:
+                    raise ValueError(f"Vector dim mismatch (store has {self._dim}, got {vectors.shape[1]})")
+                dim = vectors.shape[1]
+                new_rows: List[int] = []
+                seen = set()
+                for i, cid in enumerate(ids):
+                    if cid in self._index or cid in seen:
+                        continue
+                    seen.add(cid)
+                    new_rows.append(i)
+                if not new_rows:
+                    return
+                # vectors first, then ids: a crash in between leaves orphan rows,
+                # which we drop by truncating to the committed row count.
+                with open(self._vec_path, "ab") as vf:
+                    vf.truncate(len(self._index) * dim * 4)
+                    vf.write(vectors[new_rows].tobytes())
+                    vf.flush()
+                    os.fsync(vf.fileno())
+                with open(self._ids_path, "ab") as idf:
+                    idf.write("".join(f"{ids[i]}\t{dim}\n" for i in new_rows).encode("utf-8"))
+                self._refresh()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lockf, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._index)}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+# --- Registry (one store per model) --------------------------------------------
+_stores: Dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+def get_store(model_name: str) -> EmbeddingStore:
+    with _stores_lock:
+        store = _stores.get(model_name)
+        if store is None:
+            store = EmbeddingStore(os.path.join(cfg.CACHE_PATH, "embeddings", _slug(model_name)))
+            _stores[model_name] = store
+        return store
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters for every store opened in this process."""
+    return {name: s.stats() for name, s in _stores.items()}
+
+
+__all__ = ["EmbeddingStore", "get_store", "stats"]
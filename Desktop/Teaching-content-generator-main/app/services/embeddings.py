@@ -1,68 +1,109 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Iterable
+from typing import TYPE_CHECKING, List, Dict
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
 import app.config as cfg
 from app.services.chunker import normalize_text
+from app.services import embed_pool, embedding_store, metrics, model_registry
+from app.services.embedded import EmbeddedChunks
 
-# Load the ST model once (free, local)
-_model: SentenceTransformer | None = None
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
+# The ST model is loaded once per process, lazily, by the shared model registry
 def _get_st_model() -> SentenceTransformer:
-    global _model
-    if _model is None:
-        _model = SentenceTransformer(cfg.EMBEDDING_MODEL_NAME)
-    return _model
+    return model_registry.get_embedding_model()
 
-def _batched(iterable: Iterable[Any], n: int) -> Iterable[List[Any]]:
-    batch: List[Any] = []
-    for item in iterable:
-        batch.append(item)
-        if len(batch) >= n:
-            yield batch
-            batch = []
+def _adaptive_batches(texts: List[str], max_batch: int, token_budget: int) -> List[List[int]]:
+    """
+    Group text indices into batches of similar length so padding stays small.
+    Texts are sorted by length; a batch closes when it reaches max_batch items or
+    when (items x longest item) would exceed token_budget (~4 chars per token).
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    longest = 0
+    for i in order:
+        n_tok = len(texts[i]) // 4 + 1
+        if batch and (len(batch) >= max_batch or (len(batch) + 1) * max(longest, n_tok) > token_budget):
+            batches.append(batch)
+            batch, longest = [], 0
+        batch.append(i)
+        longest = max(longest, n_tok)
     if batch:
-        yield batch
+        batches.append(batch)
+    return batches
 
+@metrics.timed("embed")
 def embed_texts(
     texts: List[str],
     batch_size: int = 64,
     normalize: bool = True,
-) -> List[List[float]]:
+) -> np.ndarray:
     """
     Embed a list of strings locally using SentenceTransformers (all-MiniLM-L6-v2).
-    Returns: list of vectors (one per input).
+    Batches are length-bucketed (batch_size is the upper bound); large inputs
+    are sharded across the embedding process pool.
+    Returns: (len(texts), dim) float32 ndarray, one row per input.
     """
-    model = _get_st_model()
+    if not texts:
+        return np.empty((0, _get_st_model().get_sentence_embedding_dimension()), dtype=np.float32)
+
+    clean = [normalize_text(t) if normalize else t for t in texts]
+    batches = _adaptive_batches(clean, batch_size, cfg.EMBED_BATCH_TOKEN_BUDGET)
+    metrics.inc("embedded_texts_total", len(clean))
+    for b in batches:
+        metrics.observe("embed_batch_size", len(b))
 
-    vectors: List[List[float]] = []
-    for batch in _batched(texts, n=batch_size):
-        clean_batch = [normalize_text(t) if normalize else t for t in batch]
-        emb = model.encode(clean_batch, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False)
-        # emb is (batch, dim) float32 ndarray
-        if isinstance(emb, np.ndarray):
-            for row in emb:
-                vectors.append(row.astype(float).tolist())
-        else:
-            # just in case encode returns list
-            vectors.extend([[float(x) for x in row] for row in emb])
-    return vectors
+    if embed_pool.should_use(len(clean)):
+        results = embed_pool.encode_batches([[clean[i] for i in b] for b in batches])
+    else:
+        model = _get_st_model()
+        results = (
+            model.encode([clean[i] for i in b], convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False)
+            for b in batches
+        )
+
+    out: np.ndarray | None = None
+    for b, emb in zip(batches, results):
+        if out is None:
+            out = np.empty((len(texts), emb.shape[1]), dtype=np.float32)
+        # emb is (batch, dim) float32; scatter rows back to input order
+        out[b] = emb
+    return out
 
 def embed_chunks(
     chunks: List[Dict[str, str]],
     batch_size: int = 64,
-) -> List[Dict[str, Any]]:
+    use_cache: bool = True,
+) -> EmbeddedChunks:
     """
     Embed a list of chunk dicts: [{"id": "...", "text": "..."}].
-    Returns: [{"id": "...", "text": "...", "vector": [...]}, ...]
+    Vectors are cached per (model, chunk_id); only cache misses are encoded.
+    Returns: EmbeddedChunks(ids, texts, vectors) with vectors as one float32 matrix.
     """
-    if not chunks:
-        return []
+    ids = [c["id"] for c in chunks]
     texts = [c["text"] for c in chunks]
-    vectors = embed_texts(texts, batch_size=batch_size)
-    out: List[Dict[str, Any]] = []
-    for c, v in zip(chunks, vectors):
-        out.append({"id": c["id"], "text": c["text"], "vector": v})
-    return out
+    if not chunks:
+        return EmbeddedChunks.empty(_get_st_model().get_sentence_embedding_dimension())
+    if not use_cache:
+        return EmbeddedChunks(ids, texts, embed_texts(texts, batch_size=batch_size))
+
+    store = embedding_store.get_store(model_registry.embedding_model_key())
+    vectors, hit = store.lookup(ids)
+    miss_pos = np.flatnonzero(~hit)
+    metrics.cache_access("embedding", True, len(ids) - miss_pos.size)
+    metrics.cache_access("embedding", False, miss_pos.size)
+    if miss_pos.size:
+        fresh = embed_texts([texts[i] for i in miss_pos], batch_size=batch_size)
+        store.put_many([ids[i] for i in miss_pos], fresh)
+        if vectors is None:
+            vectors = np.empty((len(ids), fresh.shape[1]), dtype=np.float32)
+        vectors[miss_pos] = fresh
+    return EmbeddedChunks(ids, texts, vectors)
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Embedding cache hit/miss counters per model."""
+    return embedding_store.stats()
@@ -0,0 +1,250 @@
+"""
+Bulk video ingestion: fetch -> chunk -> embed -> upsert as a streaming pipeline.
+
+  fetch + translate   I/O bound   INGEST_FETCH_WORKERS threads
+  chunk               CPU bound   inline, or INGEST_CHUNK_PROCESSES worker processes
+  embed               CPU bound   chunks from several videos batched into one encode
+  upsert              I/O bound   INGEST_UPSERT_WORKERS threads
+
+Stages are connected by bounded queues, so memory stays flat however many videos
+are queued, and a slow stage back-pressures the ones before it.
+
+By default ingestion is incremental: chunk ids are diffed against the video's
+manifest, only new chunks are embedded/upserted and vanished ones are deleted.
+Each video holds its "sync" lease from diff to upsert, so a concurrent ingest of
+the same video (any thread or process) waits and then finds nothing left to do.
+
+CLI:
+    python -m app.services.ingest VIDEO [VIDEO ...] [--file ids.txt] [--full]
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import app.config as cfg
+from app.services import singleflight
+from app.services.chunker import make_chunks
+from app.services.embeddings import embed_chunks
+from app.services.sync import apply_sync, plan_sync
+from app.services.vector_store import get_vector_store
+from app.services.youtube import extract_video_id, get_transcript_text
+
+ProgressFn = Callable[[str, Dict[str, Any]], None]
+
+_DONE = object()  # end-of-stream marker between stages
+
+
+class _Progress:
+    """Per-video state shared by all stages; forwards every change to on_progress."""
+
+    def __init__(self, video_ids: List[str], on_progress: Optional[ProgressFn]):
+        self.state: Dict[str, Dict[str, Any]] = {v: {"stage": "queued"} for v in video_ids}
+        self._on_progress = on_progress
+        self._lock = threading.Lock()
+
+    def set(self, video_id: str, **fields: Any) -> None:
+        with self._lock:
+            self.state[video_id].update(fields)
+            snapshot = dict(self.state[video_id])
+        if self._on_progress:
+            self._on_progress(video_id, snapshot)
+
+    def fail(self, video_id: str, stage: str, exc: BaseException) -> None:
+        self.set(video_id, stage="failed", failed_stage=stage, error=str(exc))
+
+
+def ingest_videos(
+    videos: List[str],
+    on_progress: Optional[ProgressFn] = None,
+    incremental: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Ingest many videos (urls or ids) into the vector store.
+    incremental=False re-embeds and re-upserts every chunk (still deleting vanished ones).
+    Returns: {video_id: {"stage": "done" | "failed", "chunks": n, "upserted": n, "deleted": n, "error"?: ...}}
+    """
+    ids: List[str] = []
+    bad: Dict[str, Dict[str, Any]] = {}
+    for v in videos:
+        try:
+            vid = extract_video_id(v)
+        except ValueError as e:
+            bad[v] = {"stage": "failed", "failed_stage": "parse", "error": str(e)}
+            continue
+        if vid not in ids:
+            ids.append(vid)
+
+    progress = _Progress(ids, on_progress)
+    fetched: "queue.Queue" = queue.Queue(maxsize=cfg.INGEST_QUEUE_SIZE)
+    embedded: "queue.Queue" = queue.Queue(maxsize=cfg.INGEST_QUEUE_SIZE)
+    store = get_vector_store()
+    leases: Dict[str, singleflight.Lease] = {}
+
+    def release(vid: str) -> None:
+        lease = leases.pop(vid, None)
+        if lease is not None:
+            lease.release()
+
+    # --- stage 1: fetch (threads) ---
+    def fetch(vid: str) -> None:
+        progress.set(vid, stage="fetching")
+        try:
+            record = get_transcript_text(vid)
+        except Exception as e:
+            progress.fail(vid, "fetch", e)
+            return
+        progress.set(vid, stage="fetched", chars=len(record["text"]))
+        fetched.put((vid, record["text"]))  # blocks when chunk/embed falls behind
+
+    def fetch_all() -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=cfg.INGEST_FETCH_WORKERS, thread_name_prefix="ingest-fetch") as ex:
+                list(ex.map(fetch, ids))
+        finally:
+            fetched.put(_DONE)  # even if a fetch raised: stage 2 waits for it
+
+    # --- stage 2: chunk + batched embed ---
+    def chunk_and_embed() -> None:
+        procs = None
+        if cfg.INGEST_CHUNK_PROCESSES > 0:
+            # same start method as embed_pool: forking a process already running torch threads can deadlock
+            ctx = multiprocessing.get_context(cfg.EMBED_POOL_START_METHOD)
+            procs = ProcessPoolExecutor(cfg.INGEST_CHUNK_PROCESSES, mp_context=ctx)
+        done = False
+        try:
+            while not done:
+                # block for one transcript, then drain what is already waiting
+                items = [fetched.get()]
+                while len(items) < cfg.INGEST_EMBED_VIDEOS:
+                    try:
+                        items.append(fetched.get_nowait())
+                    except queue.Empty:
+                        break
+                if any(i is _DONE for i in items):
+                    done = True
+                    items = [i for i in items if i is not _DONE]
+                if not items:
+                    continue
+
+                for vid, _ in items:
+                    progress.set(vid, stage="chunking")
+                texts = [text for _, text in items]
+                try:
+                    chunk_lists = list(procs.map(make_chunks, texts)) if procs else [make_chunks(t) for t in texts]
+                except Exception:
+                    chunk_lists = []
+                    for vid, text in items:  # isolate the failing video
+                        try:
+                            chunk_lists.append(make_chunks(text))
+                        except Exception as e:
+                            progress.fail(vid, "chunk", e)
+                            chunk_lists.append(None)
+
+                ready = [(vid, ch) for (vid, _), ch in zip(items, chunk_lists) if ch is not None]
+                for vid, _ in sorted(ready):  # fixed order: no lock cycles between ingests
+                    progress.set(vid, stage="waiting")
+                    leases[vid] = singleflight.lease("sync", vid)
+
+                batch = []
+                for vid, ch in ready:
+                    try:
+                        plan = plan_sync(vid, ch, incremental=incremental)
+                    except Exception as e:
+                        progress.fail(vid, "diff", e)
+                        release(vid)
+                        continue
+                    progress.set(vid, stage="embedding", chunks=len(ch), unchanged=plan.unchanged)
+                    batch.append((vid, plan))
+                try:
+                    # one encode for all videos in the batch, split back per video
+                    all_emb = embed_chunks([c for _, plan in batch for c in plan.to_embed])
+                except Exception as e:
+                    for vid, _ in batch:
+                        progress.fail(vid, "embed", e)
+                        release(vid)
+                    continue
+                start = 0
+                for vid, plan in batch:
+                    n = len(plan.to_embed)
+                    embedded.put((vid, plan, all_emb.take(list(range(start, start + n)))))
+                    start += n
+        finally:
+            if procs:
+                procs.shutdown()
+            while not done:  # stopped early: keep draining so fetchers never block on a full queue
+                item = fetched.get()
+                if item is _DONE:
+                    done = True
+                else:
+                    progress.fail(item[0], "embed", RuntimeError("embed stage stopped"))
+            for _ in range(cfg.INGEST_UPSERT_WORKERS):
+                embedded.put(_DONE)
+
+    # --- stage 3: upsert (threads) ---
+    def upsert_worker() -> None:
+        while True:
+            item = embedded.get()
+            if item is _DONE:
+                return
+            vid, plan, emb = item
+            progress.set(vid, stage="upserting")
+            try:
+                counts = apply_sync(plan, emb, store=store)
+            except Exception as e:
+                progress.fail(vid, "upsert", e)
+                continue
+            finally:
+                release(vid)
+            progress.set(vid, stage="done", upserted=counts["upserted"], deleted=counts["deleted"])
+
+    threads = [threading.Thread(target=fetch_all, name="ingest-fetch-main", daemon=True),
+               threading.Thread(target=chunk_and_embed, name="ingest-embed", daemon=True)]
+    threads += [threading.Thread(target=upsert_worker, name=f"ingest-upsert-{i}", daemon=True)
+                for i in range(cfg.INGEST_UPSERT_WORKERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for vid in list(leases):  # a stage died unexpectedly: never leave a video locked
+        release(vid)
+
+    result = dict(progress.state)
+    result.update(bad)
+    return result
+
+
+# --- CLI -------------------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Bulk-ingest YouTube videos into the vector store.")
+    ap.add_argument("videos", nargs="*", help="video ids or urls")
+    ap.add_argument("--file", help="file with one video id/url per line")
+    ap.add_argument("--full", action="store_true", help="re-embed and re-upsert every chunk")
+    args = ap.parse_args(argv)
+
+    videos = list(args.videos)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            videos += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not videos:
+        ap.error("no videos given")
+
+    t0 = time.perf_counter()
+
+    def show(vid: str, state: Dict[str, Any]) -> None:
+        extra = f" ({state['error']})" if state.get("error") else ""
+        print(f"[{time.perf_counter() - t0:7.1f}s] {vid}: {state['stage']}{extra}", file=sys.stderr)
+
+    result = ingest_videos(videos, on_progress=show, incremental=not args.full)
+    print(json.dumps(result, indent=2))
+    return 0 if all(s["stage"] == "done" for s in result.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import app.config as cfg
+
+# Background job subsystem for slow pipelines (plan / content generation, ingestion).
+#  - submit() returns a job id immediately; a bounded thread pool runs the handler
+#  - job state lives in a store: in-memory (single process) or SQLite (shared by
+#    all workers on the box, so any worker can answer status/result requests)
+#  - finished jobs are dropped after JOB_RESULT_TTL seconds
+# Handlers are fn(payload, report) -> JSON-serializable result; report(dict)
+# publishes progress while the job runs.
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+Handler = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Any]
+
+
+class QueueFull(RuntimeError):
+    """Raised by submit() when JOB_MAX_PENDING jobs are already waiting."""
+
+
+# --- Stores ----------------------------------------------------------------------
+class MemoryJobStore:
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def purge(self, older_than: float) -> None:
+        with self._lock:
+            for jid in [j for j, job in self._jobs.items() if job.get("finished") and job["finished"] < older_than]:
+                del self._jobs[jid]
+
+
+class SQLiteJobStore:
+    _COLUMNS = ("id", "kind", "status", "created", "started", "finished", "progress", "result", "error")
+    _JSON = ("progress", "result")
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")  # persistent: set once per database file
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT, status TEXT, created REAL, started REAL, "
+                "finished REAL, progress TEXT, result TEXT, error TEXT)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One connection per operation: committed (or rolled back), then closed."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _encode(self, field: str, value: Any) -> Any:
+        return json.dumps(value) if field in self._JSON and value is not None else value
+
+    def create(self, job: Dict[str, Any]) -> None:
+        cols = [c for c in self._COLUMNS if c in job]
+        with self._connect() as db:
+            db.execute(
+                f"INSERT INTO jobs ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                [self._encode(c, job[c]) for c in cols],
+            )
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        cols = [c for c in fields if c in self._COLUMNS and c != "id"]
+        if not cols:
+            return
+        with self._connect() as db:
+            db.execute(
+                f"UPDATE jobs SET {', '.join(f'{c} = ?' for c in cols)} WHERE id = ?",
+                [self._encode(c, fields[c]) for c in cols] + [job_id],
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as db:
+            row = db.execute(f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self._COLUMNS, row))
+        for c in self._JSON:
+            if job[c] is not None:
+                job[c] = json.loads(job[c])
+        return job
+
+    def purge(self, older_than: float) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?", (older_than,))
+
+
+# --- Queue -------------------------------------------------------------------------
+class JobQueue:
+    def __init__(self, store, max_workers: int, max_pending: int, result_ttl: float):
+        self.store = store
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._handlers: Dict[str, Handler] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> str:
+        if kind not in self._handlers:
+            raise KeyError(f"Unknown job kind: {kind!r}")
+        self._purge()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already queued")
+            self._pending += 1
+        job_id = uuid.uuid4().hex
+        self.store.create({"id": job_id, "kind": kind, "status": QUEUED, "created": time.time()})
+        self._pool.submit(self._run, job_id, kind, payload)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._purge()
+        return self.store.get(job_id)
+
+    def _run(self, job_id: str, kind: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending -= 1
+
+        def report(progress: Dict[str, Any]) -> None:
+            self.store.update(job_id, progress=progress)
+
+        recorded = False
+        error = "job stopped before its outcome was recorded"
+        try:
+            self.store.update(job_id, status=RUNNING, started=time.time())
+            try:
+                result = self._handlers[kind](payload, report)
+            except Exception as e:
+                self.store.update(job_id, status=FAILED, error=str(e), finished=time.time())
+            else:
+                self.store.update(job_id, status=SUCCEEDED, result=result, finished=time.time())
+            recorded = True
+        except Exception as e:  # e.g. the store cannot encode the result
+            error = f"could not record job outcome: {type(e).__name__}: {e}"
+        finally:
+            if not recorded:  # never leave a job RUNNING: plain-text fields always store
+                self.store.update(job_id, status=FAILED, error=error, finished=time.time())
+
+    def _purge(self) -> None:
+        if self.result_ttl:
+            self.store.purge(time.time() - self.result_ttl)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+# --- Process-wide queue -------------------------------------------------------------
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            if cfg.JOB_BACKEND == "sqlite":
+                store = SQLiteJobStore(os.path.join(cfg.CACHE_PATH, "jobs.sqlite3"))
+            else:
+                store = MemoryJobStore()
+            _queue = JobQueue(store, cfg.JOB_WORKERS, cfg.JOB_MAX_PENDING, cfg.JOB_RESULT_TTL)
+        return _queue
+
+
+__all__ = [
+    "QUEUED", "RUNNING", "SUCCEEDED", "FAILED",
+    "QueueFull", "MemoryJobStore", "SQLiteJobStore", "JobQueue", "get_queue",
+]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import app.config as cfg
+from app.services import metrics, singleflight
+from app.services.disk_cache import DiskCache
+
+# Two-tier cache in front of LLM calls:
+#   exact    - sha256(model, prompt) -> answer
+#   semantic - per (kind, model, video): recent (topic embedding, answer) pairs;
+#              a new topic reuses an answer when cosine >= LLM_SEMANTIC_THRESHOLD
+# Both tiers are DiskCache-backed (size-bounded LRU + TTL, shared by workers);
+# each semantic bucket additionally keeps at most LLM_SEMANTIC_MAX_PER_VIDEO entries,
+# least recently used first out (a hit moves its entry to the end). A bucket is one
+# list, so every read-modify-write of it holds the bucket's singleflight lease.
+
+_exact: Optional[DiskCache] = None
+_semantic: Optional[DiskCache] = None
+_init_lock = threading.Lock()
+_counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+_counter_lock = threading.Lock()
+
+def _caches():
+    global _exact, _semantic
+    with _init_lock:
+        if _exact is None:
+            max_bytes = cfg.LLM_CACHE_MAX_MB * 1024 * 1024
+            _exact = DiskCache(os.path.join(cfg.CACHE_PATH, "llm", "exact"), max_bytes=max_bytes, ttl=cfg.LLM_CACHE_TTL)
+            _semantic = DiskCache(os.path.join(cfg.CACHE_PATH, "llm", "semantic"), max_bytes=max_bytes, ttl=cfg.LLM_CACHE_TTL)
+        return _exact, _semantic
+
+def _count(name: str) -> None:
+    with _counter_lock:
+        _counters[name] += 1
+    metrics.cache_access("llm", name != "misses")
+
+def _exact_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+def _embed_topic(topic: str) -> np.ndarray:
+    from app.services.embeddings import embed_texts  # loads the model only when the semantic tier is used
+    v = embed_texts([topic])[0]
+    return v / (np.linalg.norm(v) or 1.0)
+
+# --- Semantic tier ---------------------------------------------------------------
+def _semantic_lookup(bucket: str, q: np.ndarray) -> Optional[str]:
+    _, sem = _caches()
+    with singleflight.lease("llm_semantic", bucket):
+        stored: List[Dict[str, Any]] = sem.get(bucket) or []
+        now = time.time()
+        entries = [e for e in stored if not cfg.LLM_CACHE_TTL or now - e["ts"] <= cfg.LLM_CACHE_TTL]
+        if not entries:
+            return None
+        mat = np.asarray([e["vector"] for e in entries], dtype=np.float32)
+        scores = mat @ q
+        best = int(np.argmax(scores))
+        if scores[best] < cfg.LLM_SEMANTIC_THRESHOLD:
+            if len(entries) < len(stored):
+                sem.set(bucket, entries)  # drop the expired ones
+            return None
+        hit = entries.pop(best)
+        entries.append(hit)  # most recently used last
+        sem.set(bucket, entries)
+        return hit["answer"]
+
+def _semantic_store(bucket: str, topic: str, q: np.ndarray, answer: str) -> None:
+    _, sem = _caches()
+    with singleflight.lease("llm_semantic", bucket):
+        entries: List[Dict[str, Any]] = sem.get(bucket) or []
+        entries = [e for e in entries if e["topic"] != topic]
+        entries.append({"topic": topic, "vector": q.tolist(), "answer": answer, "ts": time.time()})
+        sem.set(bucket, entries[-cfg.LLM_SEMANTIC_MAX_PER_VIDEO:])  # least recently used out first
+
+# --- Public API ----------------------------------------------------------------------
+def cached_completion(
+    prompt: str,
+    generate: Callable[[], str],
+    model: str = cfg.LLM_MODEL_NAME,
+    kind: str = "default",
+    topic: Optional[str] = None,
+    video_id: Optional[str] = None,
+) -> str:
+    """
+    Return a cached answer for (model, prompt), else one for a similar topic on the
+    same video (when topic and video_id are given), else call generate() and store it.
+    """
+    if not cfg.LLM_CACHE_ENABLED:
+        return generate()
+
+    exact, _ = _caches()
+    key = _exact_key(model, prompt)
+    hit = exact.get(key)
+    if hit is not None:
+        _count("exact_hits")
+        return hit
+
+    q = None
+    bucket = f"{kind}:{model}:{video_id}"
+    if cfg.LLM_SEMANTIC_CACHE_ENABLED and topic and video_id:
+        q = _embed_topic(topic)
+        hit = _semantic_lookup(bucket, q)
+        if hit is not None:
+            _count("semantic_hits")
+            exact.set(key, hit)
+            return hit
+
+    _count("misses")
+    answer = generate()
+    exact.set(key, answer)
+    if q is not None:
+        _semantic_store(bucket, topic, q, answer)
+    return answer
+
+def stats() -> Dict[str, Any]:
+    with _counter_lock:
+        out: Dict[str, Any] = dict(_counters)
+    total = sum(out.values())
+    out["hit_rate"] = round((out["exact_hits"] + out["semantic_hits"]) / total, 4) if total else 0.0
+    return out
+
+
+__all__ = ["cached_completion", "stats"]
@@ -1,7 +1,9 @@
 import google.generativeai as genai
-from config import GOOGLE_API_KEY, LLM_MODEL_NAME
+import app.config as cfg
+from app.services import metrics
+from app.services.llm_cache import cached_completion
 
-genai.configure(api_key=GOOGLE_API_KEY)
+genai.configure(api_key=cfg.GOOGLE_API_KEY)
 
 def generate_plan_from_llm(topic, yt_link):
     prompt = f"""
@@ -9,11 +11,25 @@ def generate_plan_from_llm(topic, yt_link):
     "{topic}" using insights from the YouTube video at {yt_link}.
     The plan should include slide titles and short descriptions of what to cover.
     """
-    model = genai.GenerativeModel(LLM_MODEL_NAME)
-    response = model.generate_content(prompt)
-    return response.text.strip()
 
-def generate_content_from_plan(topic, plan, context):
+    def call():
+        return _generate(prompt, "plan")
+
+    return cached_completion(prompt, call, kind="plan", topic=topic, video_id=video_key(yt_link))
+
+def video_key(yt_link):
+    """Canonical video id for cache keys (falls back to the raw link)."""
+    from app.services.youtube import extract_video_id
+    try:
+        return extract_video_id(yt_link or "")
+    except ValueError:
+        return yt_link
+
+# Streaming mode asks the model to put this line between slides so complete
+# slides can be forwarded to the client as soon as they arrive.
+SLIDE_DELIMITER = "---"
+
+def _content_prompt(topic, plan, context, slide_delimiter=None):
     prompt = f"""
     Use the following plan and video transcript context to create full PowerPoint slide content.
 
@@ -27,6 +43,86 @@ def generate_content_from_plan(topic, plan, context):
 
     Generate: Slide titles + bullet points for each slide.
     """
-    model = genai.GenerativeModel(LLM_MODEL_NAME)
-    response = model.generate_content(prompt)
-    return response.text.strip()
+    if slide_delimiter:
+        prompt += f"""Separate consecutive slides with a line containing only {slide_delimiter}
+    """
+    return prompt
+
+def _count_prompt(prompt, kind):
+    if metrics.ENABLED:
+        from app.services.chunker import count_tokens
+        metrics.inc("llm_prompt_tokens_total", count_tokens(prompt), kind=kind)
+        metrics.inc("llm_requests_total", kind=kind)
+
+def _generate(prompt, kind):
+    """One non-streaming Gemini call, timed as stage llm_<kind>."""
+    _count_prompt(prompt, kind)
+    with metrics.span("llm_" + kind):
+        model = genai.GenerativeModel(cfg.LLM_MODEL_NAME)
+        response = model.generate_content(prompt)
+        return response.text.strip()
+
+def generate_content_from_plan(topic, plan, context):
+    prompt = _content_prompt(topic, plan, context)
+    return _generate(prompt, "content")
+
+def stream_content_from_plan(topic, plan, context):
+    """Yield text fragments of the slide deck as Gemini streams them."""
+    prompt = _content_prompt(topic, plan, context, slide_delimiter=SLIDE_DELIMITER)
+    _count_prompt(prompt, "stream")
+    model = genai.GenerativeModel(cfg.LLM_MODEL_NAME)
+    with metrics.span("llm_stream"):
+        for chunk in model.generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # chunk without text parts (e.g. safety metadata only)
+            if text:
+                yield text
+
+def generate_slide_content(topic, slide_title, slide_description, context, index=None, total=None):
+    """Generate one slide (title + bullet points) from its plan item and its own context."""
+    position = f" (slide {index + 1} of {total})" if index is not None and total else ""
+    prompt = f"""
+    Use the following plan item and video transcript context to create the content of ONE PowerPoint slide{position}.
+
+    Topic: {topic}
+
+    Slide: {slide_title}
+    {slide_description}
+
+    Transcript Context:
+    {context}
+
+    Generate: the slide title + bullet points for this slide only.
+    """
+    return _generate(prompt, "slide")
+
+def iter_slide_events(fragments, delimiter=SLIDE_DELIMITER):
+    """
+    Turn streamed text fragments into ("delta", text) events as they arrive and
+    ("slide", {"index", "text"}) events each time a complete slide is seen.
+    """
+    buf = ""   # text of the slide in progress
+    scan = 0   # buf[:scan] holds only complete, non-delimiter lines
+    index = 0
+    for fragment in fragments:
+        yield "delta", fragment
+        buf += fragment
+        # a slide is complete once its delimiter line is fully received;
+        # each character is scanned once
+        while True:
+            nl = buf.find("\n", scan)
+            if nl < 0:
+                break
+            if buf[scan:nl].strip() != delimiter:
+                scan = nl + 1
+                continue
+            slide = buf[:scan].strip()
+            buf, scan = buf[nl + 1:], 0
+            if slide:
+                yield "slide", {"index": index, "text": slide}
+                index += 1
+    tail = buf.strip()
+    if tail and tail != delimiter:
+        yield "slide", {"index": index, "text": tail}
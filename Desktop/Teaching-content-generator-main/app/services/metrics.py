@@ -0,0 +1,216 @@
+"""
+Lightweight in-process metrics: per-stage durations, sizes and cache hit counts.
+
+- span("embed") / @timed("embed") record stage_duration_seconds{stage} and add
+  to the current request's timing breakdown (sent as a Server-Timing header)
+- observe(name, value, **labels) records a histogram sample (batch sizes, tokens)
+- inc(name, n, **labels) bumps a counter; cache_access(cache, hit, n) is a shortcut
+- render() returns everything in Prometheus text exposition format
+
+With METRICS_ENABLED off, @timed returns the function unchanged and span()
+returns a shared no-op context, so the instrumented code pays one attribute check.
+Spans run in worker threads are counted in the histograms but not in the
+request's Server-Timing header (the request context lives on the calling thread).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+import app.config as cfg
+
+ENABLED = cfg.METRICS_ENABLED
+PREFIX = "tcg_"
+
+_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[str, Dict[_LabelKey, float]] = {}
+_histograms: Dict[str, Dict[_LabelKey, List[float]]] = {}  # per series: bucket counts..., sum, count
+
+# stage -> [total seconds, calls] for the request being served on this context
+_request: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("metrics_request", default=None)
+
+
+def _labels(labels: Dict[str, object]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# --- Recording --------------------------------------------------------------------
+def inc(name: str, amount: float = 1, **labels) -> None:
+    if not ENABLED:
+        return
+    key = _labels(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+def observe(name: str, value: float, **labels) -> None:
+    if not ENABLED:
+        return
+    buckets = _TIME_BUCKETS if name.endswith("_seconds") else _SIZE_BUCKETS
+    key = _labels(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        row = series.get(key)
+        if row is None:
+            row = series[key] = [0.0] * (len(buckets) + 2)
+        i = bisect_left(buckets, value)
+        if i < len(buckets):  # values above the last bound only show up in +Inf (= count)
+            row[i] += 1
+        row[-2] += value
+        row[-1] += 1
+
+
+def cache_access(cache: str, hit: bool, n: int = 1) -> None:
+    """Count n lookups against a named cache as hits or misses."""
+    if n:
+        inc("cache_requests_total", n, cache=cache, result="hit" if hit else "miss")
+
+
+class _Span:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.t0
+        observe("stage_duration_seconds", elapsed, stage=self.stage)
+        if exc_type is not None:
+            inc("stage_errors_total", stage=self.stage)
+        timings = _request.get()
+        if timings is not None:
+            slot = timings.setdefault(self.stage, [0.0, 0])
+            slot[0] += elapsed
+            slot[1] += 1
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(stage: str):
+    """Context manager timing one stage."""
+    return _Span(stage) if ENABLED else _NOOP
+
+
+def timed(stage: str):
+    """Decorator timing every call of a function as `stage` (identity when disabled)."""
+    def deco(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# --- Per-request breakdown --------------------------------------------------------
+def begin_request() -> None:
+    if ENABLED:
+        _request.set({})
+
+
+def end_request() -> Dict[str, List[float]]:
+    timings = _request.get() or {}
+    _request.set(None)
+    return timings
+
+
+def server_timing(timings: Dict[str, List[float]]) -> str:
+    """Format a stage breakdown as a Server-Timing header value."""
+    return ", ".join(
+        f'{stage};dur={total * 1000:.1f};desc="{int(calls)}x"' for stage, (total, calls) in timings.items()
+    )
+
+
+def init_app(app) -> None:
+    """Hook a Flask app: time each request and attach its Server-Timing header."""
+    if not (ENABLED and cfg.METRICS_SERVER_TIMING):
+        return
+
+    @app.before_request
+    def _begin():
+        begin_request()
+
+    @app.after_request
+    def _end(response):
+        timings = end_request()
+        if timings:
+            response.headers["Server-Timing"] = server_timing(timings)
+        return response
+
+
+# --- Exposition -------------------------------------------------------------------
+def _fmt_labels(key: _LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _num(value: float) -> str:
+    """Exact sample value: integers without exponent, other floats as repr (round-trips)."""
+    value = float(value)
+    if value.is_integer() and abs(value) < 2**53:
+        return "%d" % value
+    return repr(value)
+
+
+def render() -> str:
+    """All metrics in Prometheus text format (version 0.0.4)."""
+    lines: List[str] = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{PREFIX}{name}{_fmt_labels(key)} {_num(value)}")
+        for name, series in sorted(_histograms.items()):
+            buckets = _TIME_BUCKETS if name.endswith("_seconds") else _SIZE_BUCKETS
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for key, row in sorted(series.items()):
+                cumulative = 0.0
+                for bound, count in zip(buckets, row):
+                    cumulative += count
+                    lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(key, (('le', f'{bound:g}'),))} {_num(cumulative)}")
+                lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {_num(row[-1])}")
+                lines.append(f"{PREFIX}{name}_sum{_fmt_labels(key)} {_num(row[-2])}")
+                lines.append(f"{PREFIX}{name}_count{_fmt_labels(key)} {_num(row[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+__all__ = [
+    "span", "timed", "observe", "inc", "cache_access",
+    "begin_request", "end_request", "server_timing", "init_app", "render", "reset",
+]
@@ -0,0 +1,71 @@
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+import app.config as cfg
+
+# Maximal Marginal Relevance over candidate vectors we already hold
+# (local index rows, or Pinecone matches fetched with include_values=True).
+# Each step is whole-array NumPy: one mat-vec for the newly picked row and an
+# elementwise running max, so there is no Python-level pairwise loop.
+
+
+def mmr_select(
+    query_vector: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = cfg.MMR_LAMBDA,
+    relevance: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Pick k rows of `candidates` balancing relevance to the query against
+    redundancy with rows already picked:
+        argmax_i  lambda * sim(q, c_i) - (1 - lambda) * max_{j picked} sim(c_i, c_j)
+    relevance: per-candidate scores to use instead of sim(q, c_i) (e.g. RRF scores
+    of a hybrid search); divided by their max so they weigh like cosine similarities.
+    Returns: candidate indices in selection order.
+    """
+    cand = np.asarray(candidates, dtype=np.float32)
+    n = cand.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    norms = np.linalg.norm(cand, axis=1)
+    norms[norms == 0] = 1.0
+    cand = cand / norms[:, None]
+    q = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+    q = q / (np.linalg.norm(q) or 1.0)
+
+    if relevance is None:
+        relevance = cand @ q
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+        top = float(np.max(np.abs(relevance)))
+        relevance = relevance / (top or 1.0)
+    relevance = lambda_mult * relevance
+    available = np.ones(n, dtype=bool)
+    picked = np.empty(k, dtype=np.int64)
+
+    # first pick is pure relevance; then track max similarity to anything picked so far
+    i = int(np.argmax(relevance))
+    picked[0] = i
+    available[i] = False
+    redundancy = cand @ cand[i]
+
+    for step in range(1, k):
+        score = relevance - (1.0 - lambda_mult) * redundancy
+        score[~available] = -np.inf
+        i = int(np.argmax(score))
+        picked[step] = i
+        available[i] = False
+        np.maximum(redundancy, cand @ cand[i], out=redundancy)
+    return picked
+
+def fetch_k(top_k: int) -> int:
+    """How many candidates to over-fetch before MMR narrows them to top_k."""
+    return max(top_k, top_k * cfg.MMR_FETCH_MULTIPLIER)
+
+
+__all__ = ["mmr_select", "fetch_k"]
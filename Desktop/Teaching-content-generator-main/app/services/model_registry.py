@@ -0,0 +1,188 @@
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import app.config as cfg
+
+try:  # cross-process lock around local quantization (POSIX); thread lock only elsewhere
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+# One shared, lazily-loaded copy of each heavy model per process:
+#   "embedding" - SentenceTransformer (cfg.EMBEDDING_MODEL_NAME, cfg.EMBEDDING_BACKEND)
+#   "tokenizer" - tiktoken encoding used for chunk sizing
+# Nothing loads at import. warm_up() loads everything in the background once a
+# process starts serving (status() feeds /api/health); warm_up(background=False)
+# before workers fork (gunicorn --preload) lets them share the weights copy-on-write.
+# Never start the background warm-up before a fork: the thread does not survive it,
+# but any lock it holds at that moment stays held in the child.
+
+_models: Dict[str, Any] = {}
+_load_seconds: Dict[str, float] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+_warm = {"started": False, "done": False, "error": None}
+_quantize_lock = threading.Lock()
+
+
+# --- Loaders ----------------------------------------------------------------------
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def _missing_file_errors() -> Tuple[type, ...]:
+    """What loading a file the model repo does not ship raises (local dir / Hugging Face Hub)."""
+    try:
+        from huggingface_hub.utils import EntryNotFoundError
+    except ImportError:
+        return (FileNotFoundError,)
+    return (FileNotFoundError, EntryNotFoundError)
+
+def load_embedding_model(backend: Optional[str] = None):
+    """
+    Build a SentenceTransformer for the given backend (default cfg.EMBEDDING_BACKEND):
+      torch      full-precision PyTorch (reference)
+      onnx       ONNX Runtime export of the same weights
+      onnx-int8  dynamically quantized int8 ONNX; uses the file shipped with the model
+                 if present, else quantizes locally once into CACHE_PATH
+    """
+    from sentence_transformers import SentenceTransformer  # heavy (torch); import on first use
+
+    backend = (backend or cfg.EMBEDDING_BACKEND).lower()
+    name = cfg.EMBEDDING_MODEL_NAME
+    if backend == "torch":
+        return SentenceTransformer(name)
+    if backend == "onnx":
+        return SentenceTransformer(name, backend="onnx")
+    if backend != "onnx-int8":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend!r} (expected one of {EMBEDDING_BACKENDS})")
+
+    qfile = f"onnx/model_qint8_{cfg.EMBEDDING_QUANT_CONFIG}.onnx"
+    try:
+        return SentenceTransformer(name, backend="onnx", model_kwargs={"file_name": qfile})
+    except _missing_file_errors():
+        log.info("%s does not ship %s; quantizing locally", name, qfile)
+    except Exception:
+        log.exception("Loading the published %s of %s failed", qfile, name)
+        raise
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    local = os.path.join(cfg.CACHE_PATH, "models", f"{name.replace('/', '_')}-onnx")
+    os.makedirs(os.path.dirname(local), exist_ok=True)
+    # one exporter per cache across threads and processes; the others wait, then load its file
+    with _quantize_lock, open(local + ".lock", "a") as lockf:
+        if fcntl is not None:
+            fcntl.flock(lockf, fcntl.LOCK_EX)
+        try:
+            if not os.path.exists(os.path.join(local, qfile)):
+                model = SentenceTransformer(name, backend="onnx")
+                model.save_pretrained(local)
+                export_dynamic_quantized_onnx_model(model, cfg.EMBEDDING_QUANT_CONFIG, local)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lockf, fcntl.LOCK_UN)
+    return SentenceTransformer(local, backend="onnx", model_kwargs={"file_name": qfile})
+
+def embedding_model_key() -> str:
+    """Identity of the active embedding model for caches (backends differ numerically)."""
+    backend = (cfg.EMBEDDING_BACKEND or "torch").lower()
+    if backend == "torch":
+        return cfg.EMBEDDING_MODEL_NAME
+    if backend == "onnx-int8":
+        return f"{cfg.EMBEDDING_MODEL_NAME}@onnx-int8-{cfg.EMBEDDING_QUANT_CONFIG}"
+    return f"{cfg.EMBEDDING_MODEL_NAME}@{backend}"
+
+def _load_embedding_model():
+    return load_embedding_model()
+
+def _load_tokenizer():
+    import tiktoken
+
+    # Use a tokenizer compatible with your embedding/LLM models.
+    # (o200k_base works well with GPT-4o/Emb-3; fallback to cl100k_base if unavailable)
+    for name in (cfg.__dict__.get("TOKENIZER") or "", "o200k_base", "cl100k_base"):
+        try:
+            return tiktoken.get_encoding(name)
+        except Exception:
+            continue
+    # absolute fallback
+    return tiktoken.get_encoding("cl100k_base")
+
+_LOADERS: Dict[str, Callable[[], Any]] = {
+    "embedding": _load_embedding_model,
+    "tokenizer": _load_tokenizer,
+}
+
+
+# --- Access -------------------------------------------------------------------------
+def get(name: str) -> Any:
+    """Return the shared instance, loading it on first use (once, even under concurrency)."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        model = _models.get(name)
+        if model is None:
+            t0 = time.perf_counter()
+            model = _LOADERS[name]()
+            _load_seconds[name] = round(time.perf_counter() - t0, 3)
+            _models[name] = model
+        return model
+
+def get_embedding_model():
+    return get("embedding")
+
+def get_tokenizer():
+    return get("tokenizer")
+
+
+# --- Warm-up ------------------------------------------------------------------------
+def warm_up(background: bool = True) -> Optional[threading.Thread]:
+    """Load every registered model; in a daemon thread unless background=False."""
+
+    def run() -> None:
+        try:
+            for name in _LOADERS:
+                get(name)
+            _warm["done"] = True
+        except Exception as e:
+            _warm["error"] = str(e)
+
+    with _registry_lock:
+        if _warm["started"]:
+            return None
+        _warm["started"] = True
+    if not background:
+        run()
+        return None
+    t = threading.Thread(target=run, name="model-warmup", daemon=True)
+    t.start()
+    return t
+
+def status() -> Dict[str, Any]:
+    """Readiness for /api/health."""
+    return {
+        "ready": all(name in _models for name in _LOADERS),
+        "warming": _warm["started"] and not _warm["done"] and _warm["error"] is None,
+        "error": _warm["error"],
+        "loaded": dict(_load_seconds),
+    }
+
+
+__all__ = [
+    "EMBEDDING_BACKENDS",
+    "load_embedding_model",
+    "embedding_model_key",
+    "get",
+    "get_embedding_model",
+    "get_tokenizer",
+    "warm_up",
+    "status",
+]
@@ -1,15 +1,19 @@
 from __future__ import annotations
+import threading
 from typing import List, Dict, Any, Iterable, Optional
 
+import numpy as np
+
 import app.config as cfg
+from app.services import metrics
+from app.services.embedded import EmbeddedChunks, as_embedded
 
-# Pinecone v5 client (serverless)
+# Pinecone v5 client (serverless). Optional: only required when this backend is used,
+# so the local vector store (and tests) work without the client installed.
 try:
     from pinecone import Pinecone, ServerlessSpec
-except ImportError as e:
-    raise ImportError(
-        "Pinecone client v5 is required. Install it with:\n  pip install pinecone-client==5.0.1"
-    ) from e
+except ImportError:
+    Pinecone = ServerlessSpec = None
 
 
 # --- Constants (MiniLM embedding dim = 384) ----------------------------------
@@ -17,10 +21,23 @@ EMBED_DIM = 384
 DEFAULT_METRIC = "cosine"
 
 # --- Client + Index helpers ---------------------------------------------------
+# One client / index handle per process (they hold the HTTP connection pool).
+_pc: Optional["Pinecone"] = None
+_index = None
+_client_lock = threading.Lock()
+
 def _get_pc() -> Pinecone:
+    global _pc
+    if Pinecone is None:
+        raise ImportError(
+            "Pinecone client v5 is required. Install it with:\n  pip install pinecone-client==5.0.1"
+        )
     if not cfg.PINECONE_API_KEY:
         raise RuntimeError("Missing PINECONE_API_KEY in environment/.env")
-    return Pinecone(api_key=cfg.PINECONE_API_KEY)
+    with _client_lock:
+        if _pc is None:
+            _pc = Pinecone(api_key=cfg.PINECONE_API_KEY)
+        return _pc
 
 def _index_exists(pc: Pinecone, name: str) -> bool:
     return any(ix["name"] == name for ix in pc.list_indexes())
@@ -47,71 +64,78 @@ def ensure_index() -> None:
     )
 
 def _get_index():
-    pc = _get_pc()
-    return pc.Index(cfg.VECTOR_DB_NAME)
+    global _index
+    if _index is None:
+        pc = _get_pc()
+        with _client_lock:
+            if _index is None:
+                _index = pc.Index(cfg.VECTOR_DB_NAME)
+    return _index
 
 
 # --- Upsert / Query / Delete --------------------------------------------------
+@metrics.timed("vector_upsert")
 def upsert_chunks(
     video_id: str,
-    embedded_chunks: List[Dict[str, Any]],
+    embedded_chunks: EmbeddedChunks,
     namespace: Optional[str] = None,
     batch_size: int = 100,
     store_text_metadata: bool = True,
 ) -> int:
     """
     Upsert vectors into Pinecone.
-    - embedded_chunks: [{"id": "...", "text": "...", "vector": [...]}]
+    - embedded_chunks: EmbeddedChunks (ids, texts, float32 matrix);
+      the legacy [{"id", "text", "vector"}] list is still accepted
     - namespace defaults to per-video: f"video:{video_id}"
     Returns: number of vectors upserted
     """
-    if not embedded_chunks:
+    embedded = as_embedded(embedded_chunks, EMBED_DIM)
+    if not len(embedded):
         return 0
 
-    # sanity: dimension check
-    for c in embedded_chunks:
-        vec = c.get("vector")
-        if not isinstance(vec, (list, tuple)) or len(vec) != EMBED_DIM:
-            raise ValueError(f"Vector dim mismatch (expected {EMBED_DIM}, got {len(vec) if vec is not None else 'None'})")
+    # sanity: dimension check (one shape check for the whole matrix)
+    if embedded.dim != EMBED_DIM:
+        raise ValueError(f"Vector dim mismatch (expected {EMBED_DIM}, got {embedded.dim})")
 
     ns = namespace or f"video:{video_id}"
     index = _get_index()
 
-    # batch and upsert
+    # batch and upsert; lists are only materialized per batch, for the client
     count = 0
-    batch: List[Dict[str, Any]] = []
-    for c in embedded_chunks:
-        meta = {"text": c["text"]} if store_text_metadata else None
-        batch.append({"id": c["id"], "values": c["vector"], "metadata": meta})
-        if len(batch) >= batch_size:
-            index.upsert(vectors=batch, namespace=ns)
-            count += len(batch)
-            batch = []
-    if batch:
+    for start in range(0, len(embedded), batch_size):
+        rows = embedded.vectors[start:start + batch_size].tolist()
+        batch: List[Dict[str, Any]] = []
+        for cid, text, values in zip(embedded.ids[start:start + batch_size], embedded.texts[start:start + batch_size], rows):
+            meta = {"text": text} if store_text_metadata else None
+            batch.append({"id": cid, "values": values, "metadata": meta})
         index.upsert(vectors=batch, namespace=ns)
+        metrics.observe("vector_upsert_batch_size", len(batch))
         count += len(batch)
     return count
 
 
+@metrics.timed("vector_query")
 def query(
-    vector: List[float],
+    vector: np.ndarray,
     namespace: str,
     top_k: int = cfg.TOP_K,
     include_metadata: bool = True,
+    include_values: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Dense similarity search within a namespace.
     Returns a simplified list:
-      [{"id": "...", "score": 0.87, "text": "...(optional)..."}, ...]
+      [{"id": "...", "score": 0.87, "text": "...(optional)...", "vector": ndarray (optional)}, ...]
     """
-    if len(vector) != EMBED_DIM:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    if vector.shape[0] != EMBED_DIM:
         raise ValueError(f"Query vector must be {EMBED_DIM}-dim")
 
     index = _get_index()
     res = index.query(
-        vector=vector,
+        vector=vector.tolist(),
         top_k=top_k,
-        include_values=False,
+        include_values=include_values,
         include_metadata=include_metadata,
         namespace=namespace,
     )
@@ -123,6 +147,8 @@ def query(
         md = match.get("metadata") or {}
         if include_metadata and "text" in md:
             item["text"] = md["text"]
+        if include_values:
+            item["vector"] = np.asarray(match["values"], dtype=np.float32)
         out.append(item)
     return out
 
@@ -134,3 +160,22 @@ def delete_by_video(video_id: str) -> None:
     ns = f"video:{video_id}"
     index = _get_index()
     index.delete(delete_all=True, namespace=ns)
+
+
+def delete_ids(
+    video_id: str,
+    ids: List[str],
+    namespace: Optional[str] = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Delete specific vectors (by chunk id) from a video's namespace.
+    Returns: number of ids sent for deletion
+    """
+    if not ids:
+        return 0
+    ns = namespace or f"video:{video_id}"
+    index = _get_index()
+    for start in range(0, len(ids), batch_size):
+        index.delete(ids=list(ids[start:start + batch_size]), namespace=ns)
+    return len(ids)
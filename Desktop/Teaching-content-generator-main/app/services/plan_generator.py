@@ -1,4 +1,6 @@
-from services.llm_client import LLMClient
+from app.services.llm_client import LLMClient
+from app.services.llm_cache import cached_completion
+from app.services.llm_service import video_key
 
 class PlanService:
     def __init__(self):
@@ -23,7 +25,13 @@ class PlanService:
         4. Logical flow of concepts
         """
 
-        plan = self.llm.generate(prompt)
+        plan = cached_completion(
+            prompt,
+            lambda: self.llm.generate(prompt),
+            kind="plan_outline",
+            topic=topic,
+            video_id=video_key(link) if link else None,
+        )
         self.plans.append(plan)
         return plan
 
@@ -1,22 +1,103 @@
-from sentence_transformers import SentenceTransformer
-import numpy as np
-from services.transcript_service import fetch_transcript
-from config import CHUNK_SIZE, CHUNK_OVERLAP, TOP_K, EMBEDDING_MODEL_NAME
+from concurrent.futures import ThreadPoolExecutor
 
-# local simple RAG (no Pinecone yet)
-model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+import app.config as cfg
+from app.services.transcript_service import fetch_transcript, extract_video_id
+from app.services.chunker import make_chunks
+from app.services.embeddings import embed_chunks, embed_texts
+from app.services import metrics, retrieval_index, segment_store
+from app.services.context_packer import PackedContext, pack_context
+from app.services.retrieval_index import RetrievalIndex
 
-def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+# local RAG: one cached retrieval index per video (no Pinecone round trip)
+
+def chunk_text(text, chunk_size=cfg.CHUNK_SIZE, overlap=cfg.CHUNK_OVERLAP):
     chunks = []
     for i in range(0, len(text), chunk_size - overlap):
         chunks.append(text[i:i+chunk_size])
     return chunks
 
-def retrieve_relevant_context(yt_link, query):
+def _build_index(video_id, yt_link) -> RetrievalIndex:
     transcript = fetch_transcript(yt_link)
-    chunks = chunk_text(transcript)
-    embeddings = model.encode(chunks)
-    q_emb = model.encode([query])[0]
-    scores = np.dot(embeddings, q_emb) / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(q_emb))
-    top_idx = np.argsort(scores)[-TOP_K:][::-1]
-    return "\n".join([chunks[i] for i in top_idx])
+    chunks = make_chunks(transcript)
+    segments = segment_store.load(video_id)
+    if segments is not None:
+        segments.annotate(chunks)  # t_start / t_end per chunk
+    return RetrievalIndex.from_embedded(video_id, embed_chunks(chunks), chunks)
+
+def get_video_index(yt_link) -> RetrievalIndex:
+    video_id = extract_video_id(yt_link)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL")
+    return retrieval_index.get_index(video_id, lambda: _build_index(video_id, yt_link))
+
+@metrics.timed("retrieve")
+def retrieve_packed_context(yt_link, query, top_k=cfg.TOP_K, budget=None, window=None) -> PackedContext:
+    """
+    Top-k chunks for the query, stitched/de-duplicated and packed into a token budget.
+    window=(t_start, t_end) in seconds restricts retrieval to that part of the video.
+    """
+    index = get_video_index(yt_link)
+    if window is not None:
+        index = index.window(*window)
+    q_emb = embed_texts([query])[0]
+    hits = index.search(q_emb, top_k, query_text=query)
+    return pack_context([index.hit(r, s) for r, s in hits], budget)
+
+def retrieve_relevant_context(yt_link, query, top_k=cfg.TOP_K, budget=None, window=None):
+    return retrieve_packed_context(yt_link, query, top_k, budget, window).text
+
+def transcript_window(yt_link, t_start, t_end):
+    """Transcript text spoken between t_start and t_end seconds (from the stored segments)."""
+    video_id = extract_video_id(yt_link)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL")
+    segments = segment_store.load(video_id)
+    if segments is None:
+        fetch_transcript(yt_link)  # first use (or cached before timings were kept)
+        segments = segment_store.load(video_id)
+    return segments.slice(t_start, t_end)
+
+@metrics.timed("retrieve")
+def retrieve_many(yt_link, queries, top_k=cfg.TOP_K, dedupe=False):
+    """
+    Retrieve for many queries against one video in a single batch:
+    one encode call for all queries, one matrix-matrix product for all scores.
+    dedupe=True hands each chunk to at most one query (earlier queries win).
+    Returns: per query, [{"id": "...", "text": "...", "score": 0.032, "start": 0, "end": 3120}, ...]
+    ("score" is the RRF score with HYBRID_SEARCH, else cosine similarity)
+    """
+    if not queries:
+        return []
+    index = get_video_index(yt_link)
+    hits = index.search_many(embed_texts(list(queries)), top_k, dedupe=dedupe, query_texts=list(queries))
+    return [
+        [index.hit(r, s) for r, s in per_query]
+        for per_query in hits
+    ]
+
+@metrics.timed("retrieve")
+def retrieve_across(yt_links, query, top_k=cfg.TOP_K):
+    """
+    Retrieve from several videos at once. Indexes are loaded/built concurrently,
+    then scored as one stacked matrix so latency stays close to a single query.
+    Returns: [{"video_id": "...", "id": "...", "text": "...", "score": 0.032}, ...] best first
+    ("score" is the RRF score with HYBRID_SEARCH, else cosine similarity).
+    """
+    by_video = {}
+    for link in yt_links:  # keep order, one link per video (urls for the same video differ)
+        video_id = extract_video_id(link)
+        if not video_id:
+            raise ValueError(f"Invalid YouTube URL: {link}")
+        by_video.setdefault(video_id, link)
+    links = list(by_video.values())
+    if not links:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(cfg.VECTOR_QUERY_CONCURRENCY, len(links)))) as ex:
+        indexes = list(ex.map(get_video_index, links))
+    stacked = retrieval_index.get_stacked(indexes)
+    q_emb = embed_texts([query])[0]
+    out = []
+    for video_id, row, score in stacked.search(q_emb, top_k, query_text=query):
+        ix = stacked.indexes[stacked.video_ids.index(video_id)]
+        out.append({"video_id": video_id, "id": ix.ids[row], "text": ix.texts[row], "score": score})
+    return out
@@ -0,0 +1,387 @@
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+import app.config as cfg
+from app.services import bm25, metrics, mmr, model_registry, singleflight
+from app.services.bm25 import BM25Corpus, BM25Index
+from app.services.embedded import EmbeddedChunks
+
+# Per-video dense retrieval index, built once per (video, model, chunking config):
+#   matrix  (n_chunks, dim) float32, rows L2-normalized at build time
+#   ids / texts aligned with matrix rows
+#   spans   (n_chunks, 2) int64 char [start, end) of each chunk in the normalized
+#           transcript (-1 where unknown), used to stitch adjacent hits back together
+#   times   (n_chunks, 2) float32 [t_start, t_end] seconds (NaN where unknown);
+#           rows are in transcript order, so a time window is a contiguous row range
+#   bm25    BM25 inverted index over the texts (CSR arrays, see bm25.py)
+# A query then costs one encode + one mat-vec product + argpartition top-k; with
+# HYBRID_SEARCH the dense and BM25 candidate lists are merged by reciprocal-rank fusion.
+# Indexes live in a bounded in-memory LRU, with an .npz copy on disk.
+
+
+class RetrievalIndex:
+    def __init__(
+        self,
+        video_id: str,
+        ids: List[str],
+        texts: List[str],
+        matrix: np.ndarray,
+        spans: Optional[np.ndarray] = None,
+        times: Optional[np.ndarray] = None,
+        lexical: Optional[BM25Index] = None,
+        lexical_rows: Optional[Tuple[int, int]] = None,
+    ):
+        self.video_id = video_id
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.matrix = matrix
+        self.spans = spans if spans is not None else np.full((len(self.ids), 2), -1, dtype=np.int64)
+        self.times = times if times is not None else np.full((len(self.ids), 2), np.nan, dtype=np.float32)
+        self._lexical = lexical
+        self._lexical_rows = lexical_rows  # window views share the parent's BM25 index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def lexical(self) -> BM25Index:
+        if self._lexical is None:
+            self._lexical = BM25Index.build(self.texts)
+        return self._lexical
+
+    def lexical_scores(self, query: str) -> np.ndarray:
+        """(len(self),) BM25 scores for the query."""
+        scores = self.lexical.scores(query)
+        if self._lexical_rows is not None:
+            lo, hi = self._lexical_rows
+            scores = scores[lo:hi]
+        return scores
+
+    # --- Build / persist ------------------------------------------------------
+    @classmethod
+    def from_embedded(cls, video_id: str, embedded: EmbeddedChunks, chunks: Optional[List[dict]] = None) -> "RetrievalIndex":
+        """chunks: the make_chunks() output the vectors came from (char/time spans)."""
+        spans = times = None
+        if chunks is not None:
+            spans = np.array([(c.get("start", -1), c.get("end", -1)) for c in chunks], dtype=np.int64).reshape(-1, 2)
+            times = np.array(
+                [(c.get("t_start", np.nan), c.get("t_end", np.nan)) for c in chunks], dtype=np.float32
+            ).reshape(-1, 2)
+        index = cls(video_id, embedded.ids, embedded.texts, normalize_rows(embedded.vectors), spans, times)
+        index.lexical  # build the BM25 postings now, alongside the chunks
+        return index
+
+    def hit(self, row: int, score: float) -> dict:
+        """{"id", "text", "score"} for a row, plus "start"/"end" and "t_start"/"t_end" when known."""
+        out = {"id": self.ids[row], "text": self.texts[row], "score": score}
+        start, end = self.spans[row]
+        if start >= 0:
+            out["start"], out["end"] = int(start), int(end)
+        t_start, t_end = self.times[row]
+        if not np.isnan(t_start):
+            out["t_start"], out["t_end"] = round(float(t_start), 2), round(float(t_end), 2)
+        return out
+
+    def window(self, t_start: float, t_end: float) -> "RetrievalIndex":
+        """
+        View restricted to chunks overlapping [t_start, t_end] seconds (two binary
+        searches; matrix rows are a slice, not a copy). Raises if timings are unknown.
+        """
+        if len(self) and np.isnan(self.times[0, 0]):
+            raise ValueError(f"No timing information for video {self.video_id}")
+        lo = int(np.searchsorted(self.times[:, 1], t_start, side="left"))
+        hi = int(np.searchsorted(self.times[:, 0], t_end, side="right"))
+        hi = max(lo, hi)
+        base = self._lexical_rows[0] if self._lexical_rows is not None else 0
+        return RetrievalIndex(
+            self.video_id, self.ids[lo:hi], self.texts[lo:hi], self.matrix[lo:hi], self.spans[lo:hi], self.times[lo:hi],
+            lexical=self.lexical, lexical_rows=(base + lo, base + hi),
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    video_id=np.array(self.video_id),
+                    ids=np.array(self.ids, dtype=str),
+                    texts=np.array(self.texts, dtype=str),
+                    matrix=self.matrix,
+                    spans=self.spans,
+                    times=self.times,
+                    **self.lexical.to_arrays(),
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "RetrievalIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                str(data["video_id"]),
+                data["ids"].tolist(),
+                data["texts"].tolist(),
+                np.ascontiguousarray(data["matrix"], dtype=np.float32),
+                data["spans"] if "spans" in data.files else None,
+                data["times"] if "times" in data.files else None,
+                BM25Index.from_arrays(data) if "bm25_terms" in data.files else None,
+            )
+
+    # --- Search ---------------------------------------------------------------
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = cfg.TOP_K,
+        use_mmr: Optional[bool] = None,
+        lambda_mult: float = cfg.MMR_LAMBDA,
+        query_text: Optional[str] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return [(row, score), ...] for the top_k rows, best first.
+        Scores are cosine, or RRF scores when query_text is given and HYBRID_SEARCH is on.
+        With MMR (default: cfg.USE_MMR) an over-fetched candidate set is re-ranked
+        for diversity, in MMR selection order; its relevance term is the RRF score
+        in hybrid mode, so fusion still decides what counts as relevant.
+        """
+        q = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        texts = [query_text] if query_text is not None else None
+        return self.search_many(q, top_k, use_mmr=use_mmr, lambda_mult=lambda_mult, query_texts=texts)[0]
+
+    def search_many(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int = cfg.TOP_K,
+        use_mmr: Optional[bool] = None,
+        lambda_mult: float = cfg.MMR_LAMBDA,
+        dedupe: bool = False,
+        query_texts: Optional[List[str]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Batched search: all queries are scored with one (m, dim) x (dim, n) product.
+        dedupe=True gives each row to at most one query (earlier queries win),
+        e.g. so consecutive slides don't receive the same chunk.
+        query_texts (aligned with query_vectors) enable hybrid search: the dense
+        and BM25 top candidates are fused by RRF, which also catches exact terms
+        (formulas, acronyms, identifiers) the embedding misses.
+        Returns: per query, [(row, cosine score or RRF score), ...]
+        """
+        Q = normalize_rows(np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.matrix.shape[1]))
+        m = Q.shape[0]
+        if not self.ids:
+            return [[] for _ in range(m)]
+        scores = Q @ self.matrix.T
+        use_mmr = cfg.USE_MMR if use_mmr is None else use_mmr
+        hybrid = cfg.HYBRID_SEARCH and query_texts is not None
+
+        fetch = mmr.fetch_k(top_k) if use_mmr else top_k
+        if hybrid:
+            fetch = max(fetch, top_k * cfg.HYBRID_CANDIDATES)
+        if dedupe:
+            fetch += top_k * (m - 1)  # enough for every earlier query to have taken its k rows
+        cands = top_k_rows(scores, fetch)
+
+        out: List[List[Tuple[int, float]]] = []
+        used = np.zeros(len(self.ids), dtype=bool)
+        for qi in range(m):
+            cand = cands[qi]
+            fused = None
+            if hybrid:
+                lex = self.lexical_scores(query_texts[qi])
+                lex_rows = top_k_indices(lex, fetch)
+                fused = dict(bm25.rrf([cand, lex_rows[lex[lex_rows] > 0]]))
+                cand = np.fromiter(fused, dtype=np.int64, count=len(fused))  # fused order
+            if dedupe:
+                cand = cand[~used[cand]]
+            if use_mmr:
+                relevance = np.array([fused[r] for r in cand.tolist()], dtype=np.float32) if fused is not None else None
+                rows = cand[mmr.mmr_select(Q[qi], self.matrix[cand], top_k, lambda_mult, relevance=relevance)]
+            else:
+                rows = cand[:top_k]
+            used[rows] = True
+            out.append([(int(r), float(fused[r] if fused is not None else scores[qi, r])) for r in rows])
+        return out
+
+
+class StackedIndex:
+    """
+    Several per-video indexes stacked into one matrix, so a query over many
+    videos is still one mat-vec + one top-k. Row r belongs to video_ids[owner[r]].
+    """
+
+    def __init__(self, indexes: List[RetrievalIndex]):
+        self.indexes = list(indexes)
+        self.video_ids = [ix.video_id for ix in self.indexes]
+        sizes = [len(ix) for ix in self.indexes]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        self.owner = np.repeat(np.arange(len(self.indexes)), sizes)
+        dim = self.indexes[0].matrix.shape[1] if self.indexes else 0
+        self.matrix = np.vstack([ix.matrix for ix in self.indexes]) if sum(sizes) else np.empty((0, dim), np.float32)
+        self._lexical: Optional[BM25Corpus] = None
+
+    @property
+    def lexical(self) -> BM25Corpus:
+        """BM25 over all stacked rows as one corpus (per-video IDFs are not comparable)."""
+        if self._lexical is None:
+            self._lexical = BM25Corpus([
+                (ix.lexical, *(ix._lexical_rows or (0, len(ix)))) for ix in self.indexes
+            ])
+        return self._lexical
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = cfg.TOP_K,
+        query_text: Optional[str] = None,
+    ) -> List[Tuple[str, int, float]]:
+        """
+        Global top_k across all videos: [(video_id, row within that video, score), ...].
+        With query_text (and HYBRID_SEARCH) dense and BM25 rankings are RRF-fused; on
+        corpora of HYBRID_PREFILTER_MIN_ROWS+ rows the BM25 top HYBRID_PREFILTER_SIZE
+        rows are the shortlist, and only those are scored densely.
+        """
+        n = self.matrix.shape[0]
+        if n == 0:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        q = q / (np.linalg.norm(q) or 1.0)
+
+        if query_text is None or not cfg.HYBRID_SEARCH:
+            scores = self.matrix @ q
+            ranked = [(int(r), float(scores[r])) for r in top_k_indices(scores, top_k)]
+        else:
+            fetch = top_k * cfg.HYBRID_CANDIDATES
+            lex = self.lexical.scores(query_text)
+            lex_rows = top_k_indices(lex, max(fetch, cfg.HYBRID_PREFILTER_SIZE))
+            lex_rows = lex_rows[lex[lex_rows] > 0]
+            if n >= cfg.HYBRID_PREFILTER_MIN_ROWS and lex_rows.size:
+                dense = self.matrix[lex_rows] @ q  # shortlist only
+                dense_rows = lex_rows[top_k_indices(dense, fetch)]
+            else:
+                dense_rows = top_k_indices(self.matrix @ q, fetch)
+            ranked = bm25.rrf([dense_rows, lex_rows[:fetch]])[:top_k]
+
+        out = []
+        for r, score in ranked:
+            v = int(self.owner[r])
+            out.append((self.video_ids[v], int(r - self.offsets[v]), score))
+        return out
+
+
+_stacked: "OrderedDict[tuple, StackedIndex]" = OrderedDict()
+
+def get_stacked(indexes: List[RetrievalIndex]) -> StackedIndex:
+    """StackedIndex for this exact set of index objects (LRU-cached, rebuilt if any index was rebuilt)."""
+    key = tuple(id(ix) for ix in indexes)
+    with _lock:
+        st = _stacked.get(key)
+        if st is not None and all(a is b for a, b in zip(st.indexes, indexes)):
+            _stacked.move_to_end(key)
+            return st
+    st = StackedIndex(indexes)
+    with _lock:
+        _stacked[key] = st
+        while len(_stacked) > cfg.RETRIEVAL_CACHE_SIZE:
+            _stacked.popitem(last=False)
+    return st
+
+
+# --- Vector helpers -------------------------------------------------------------
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, sorted descending (argpartition, no full sort)."""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top_k_indices for a (m, n) score matrix: (m, min(k, n)) indices, best first."""
+    m, n = scores.shape
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((m, 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < n else np.tile(np.arange(n), (m, 1))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+# --- Cache (memory LRU + disk) ----------------------------------------------------
+_indexes: "OrderedDict[str, RetrievalIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+def _cache_key(video_id: str) -> str:
+    fingerprint = f"v4|{model_registry.embedding_model_key()}|{cfg.TOKENIZER}|{cfg.CHUNKER}|{cfg.CHUNK_SIZE}|{cfg.CHUNK_OVERLAP}"
+    return f"{video_id}-{hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:10]}"
+
+def _disk_path(key: str) -> str:
+    return os.path.join(cfg.CACHE_PATH, "retrieval", key + ".npz")
+
+def _remember(key: str, index: RetrievalIndex) -> None:
+    with _lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > cfg.RETRIEVAL_CACHE_SIZE:
+            _indexes.popitem(last=False)
+
+def get_index(video_id: str, build: Callable[[], RetrievalIndex]) -> RetrievalIndex:
+    """
+    Return the retrieval index for a video:
+      memory LRU -> .npz on disk -> build() (then persisted).
+    Concurrent misses for the same video (threads or processes) run one build.
+    """
+    key = _cache_key(video_id)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            metrics.cache_access("retrieval_index", True)
+            return index
+    return singleflight.do("index", key, lambda: _load_or_build(key, build))
+
+def _load_or_build(key: str, build: Callable[[], RetrievalIndex]) -> RetrievalIndex:
+    path = _disk_path(key)
+    index: Optional[RetrievalIndex] = None
+    if os.path.exists(path):
+        try:
+            index = RetrievalIndex.load(path)
+        except Exception:
+            index = None  # corrupt / partial file: rebuild
+    metrics.cache_access("retrieval_index", index is not None)
+    if index is None:
+        with metrics.span("index_build"):
+            index = build()
+        index.save(path)
+
+    _remember(key, index)
+    return index
+
+def invalidate(video_id: str) -> None:
+    key = _cache_key(video_id)
+    with _lock:
+        _indexes.pop(key, None)
+    path = _disk_path(key)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+__all__ = ["RetrievalIndex", "StackedIndex", "get_stacked", "normalize_rows", "top_k_indices", "top_k_rows", "get_index", "invalidate"]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import os
+import re
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import app.config as cfg
+from app.services.chunker import normalize_text
+
+# Timestamped transcript, array-backed:
+#   text       one buffer: the normalized segment texts joined by single spaces
+#              (== normalize_text of the joined transcript, so chunk char spans
+#              from make_chunks index straight into it)
+#   offsets    (n + 1,) int64 char offset where segment i starts; offsets[n] = len(text)
+#   starts     (n,) float64 segment start, seconds
+#   durations  (n,) float32 segment duration, seconds
+# Char <-> time lookups are binary searches over offsets / starts (and over the
+# running maximum of segment ends, which stays sorted when captions overlap).
+# Persisted per (video, language) as CACHE_PATH/segments/<video>-<lang>.npz,
+# compressed, with the text stored as UTF-8 bytes.
+
+
+def _field(seg: Any, name: str, default=None):
+    """Segments are dicts in older youtube-transcript-api releases, objects in newer ones."""
+    if isinstance(seg, dict):
+        return seg.get(name, default)
+    return getattr(seg, name, default)
+
+
+class SegmentStore:
+    def __init__(self, video_id: str, text: str, offsets: np.ndarray, starts: np.ndarray, durations: np.ndarray):
+        self.video_id = video_id
+        self.text = text
+        self.offsets = offsets
+        self.starts = starts
+        self.durations = durations
+        self._max_ends = np.maximum.accumulate(starts + durations) if len(starts) else starts
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return float(self._max_ends[-1]) if len(self) else 0.0
+
+    # --- Build ------------------------------------------------------------------
+    @classmethod
+    def from_segments(cls, video_id: str, segments: Iterable[Any]) -> "SegmentStore":
+        parts: List[str] = []
+        starts: List[float] = []
+        durations: List[float] = []
+        for seg in segments:
+            txt = normalize_text(_field(seg, "text", "") or "")
+            if not txt:
+                continue
+            parts.append(txt)
+            starts.append(float(_field(seg, "start", 0.0) or 0.0))
+            durations.append(float(_field(seg, "duration", 0.0) or 0.0))
+        lengths = np.fromiter((len(p) + 1 for p in parts), dtype=np.int64, count=len(parts))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        if len(parts):
+            offsets[-1] -= 1  # no separator after the last segment
+        return cls(
+            video_id,
+            " ".join(parts),
+            offsets,
+            np.asarray(starts, dtype=np.float64),
+            np.asarray(durations, dtype=np.float32),
+        )
+
+    def retext(self, text: str) -> "SegmentStore":
+        """
+        Same timings over a different text of the whole transcript (e.g. its
+        translation). Offsets are scaled proportionally, so positions are approximate.
+        """
+        text = normalize_text(text)
+        scale = len(text) / self.offsets[-1] if self.offsets[-1] else 0.0
+        offsets = np.round(self.offsets * scale).astype(np.int64)
+        offsets[-1] = len(text)
+        return SegmentStore(self.video_id, text, offsets, self.starts, self.durations)
+
+    # --- Lookups ----------------------------------------------------------------
+    def segment_at(self, char: int) -> int:
+        """Index of the segment containing char offset `char`."""
+        i = int(np.searchsorted(self.offsets, char, side="right")) - 1
+        return min(max(i, 0), len(self) - 1)
+
+    def time_at(self, char: int) -> float:
+        """Playback time of char offset `char` (interpolated inside its segment)."""
+        if not len(self):
+            return 0.0
+        i = self.segment_at(char)
+        seg_len = max(1, self.offsets[i + 1] - self.offsets[i])
+        frac = min(max((char - self.offsets[i]) / seg_len, 0.0), 1.0)
+        return float(self.starts[i] + frac * self.durations[i])
+
+    def time_span(self, start: int, end: int) -> Tuple[float, float]:
+        """(t_start, t_end) seconds for the char span [start, end)."""
+        return self.time_at(start), self.time_at(max(start, end - 1))
+
+    def char_range(self, t_start: float, t_end: float) -> Tuple[int, int]:
+        """Char span [start, end) covering every segment that overlaps [t_start, t_end]."""
+        if not len(self):
+            return 0, 0
+        first = int(np.searchsorted(self._max_ends, t_start, side="right"))
+        last = int(np.searchsorted(self.starts, t_end, side="right"))
+        if first >= last:
+            return 0, 0
+        end = self.offsets[last] - (1 if last < len(self) else 0)  # drop the trailing separator
+        return int(self.offsets[first]), int(end)
+
+    def slice(self, t_start: float, t_end: float) -> str:
+        """Transcript text spoken between t_start and t_end (whole segments)."""
+        start, end = self.char_range(t_start, t_end)
+        return self.text[start:end]
+
+    def annotate(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add "t_start"/"t_end" (seconds) to chunks that carry char spans; returns chunks."""
+        for c in chunks:
+            if c.get("start", -1) >= 0:
+                c["t_start"], c["t_end"] = self.time_span(c["start"], c["end"])
+        return chunks
+
+    # --- Persist ----------------------------------------------------------------
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    video_id=np.array(self.video_id),
+                    text=np.frombuffer(self.text.encode("utf-8"), dtype=np.uint8),
+                    offsets=self.offsets,
+                    starts=self.starts,
+                    durations=self.durations,
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "SegmentStore":
+        with np.load(path, allow_pickle=False) as data:
+            text = data["text"]
+            # older files hold the text as a numpy unicode scalar (UTF-32)
+            text = text.tobytes().decode("utf-8") if text.dtype == np.uint8 else str(text)
+            return cls(str(data["video_id"]), text, data["offsets"], data["starts"], data["durations"])
+
+
+# --- Per-video files ------------------------------------------------------------
+def _path(video_id: str, language: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", f"{video_id}-{(language or '').lower()}")
+    return os.path.join(cfg.CACHE_PATH, "segments", safe + ".npz")
+
+def store(segments: SegmentStore, language: str = cfg.PREFERRED_LANGUAGE) -> None:
+    segments.save(_path(segments.video_id, language))
+
+def load(video_id: str, language: str = cfg.PREFERRED_LANGUAGE) -> Optional[SegmentStore]:
+    """The stored segments of a video, or None (never fetched since timings were kept)."""
+    try:
+        return SegmentStore.load(_path(video_id, language))
+    except (FileNotFoundError, OSError, ValueError, KeyError):
+        return None
+
+def exists(video_id: str, language: str = cfg.PREFERRED_LANGUAGE) -> bool:
+    return os.path.exists(_path(video_id, language))
+
+
+__all__ = ["SegmentStore", "store", "load", "exists"]
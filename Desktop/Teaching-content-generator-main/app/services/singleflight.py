@@ -0,0 +1,162 @@
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+import app.config as cfg
+from app.services import metrics
+
+try:  # cross-process leases (POSIX); process-local locks only elsewhere
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Request coalescing keyed by (stage, key), e.g. ("transcript_record", video_id).
+# Waiters get the leader's return value as-is, so a stage name belongs to one
+# function (one return type); give each kind of result its own stage.
+#
+#   do(stage, key, fn)   threads asking for the same key while a call is in flight
+#                        wait for it and share its result (or its exception);
+#                        the leader also holds the cross-process lease while fn runs
+#   lease(stage, key)    mutual exclusion for (stage, key) across threads and
+#                        processes: an flock on CACHE_PATH/locks/<sha1>.lock
+#
+# Across processes the lease only serializes: the next process runs fn after the
+# leader finished, so fn must re-check the on-disk cache the leader filled.
+# No waiter is wedged by a bad leader: a failing leader wakes its waiters with
+# the error, the kernel drops the flock of a crashed process, and any wait longer
+# than SINGLEFLIGHT_TIMEOUT gives up and runs the work uncoordinated.
+
+T = TypeVar("T")
+
+
+class Lease:
+    """A held (or, after a timeout, un-held) lease; release() is idempotent."""
+
+    def __init__(self, name: str, fd: Optional[int] = None, local: Optional[threading.Lock] = None, held: bool = True):
+        self.name = name
+        self.held = held
+        self._fd = fd
+        self._local = local
+
+    def release(self) -> None:
+        if not self.held:
+            return
+        self.held = False
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+        if self._local is not None:
+            self._local.release()
+
+    def __enter__(self) -> "Lease":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.release()
+        return False
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+_calls: Dict[str, _Call] = {}
+_local_locks: Dict[str, threading.Lock] = {}  # used when fcntl is unavailable
+_lock = threading.Lock()
+
+
+def _name(stage: str, key: str) -> str:
+    return f"{stage}:{key}"
+
+
+def _lock_path(name: str) -> str:
+    return os.path.join(cfg.CACHE_PATH, "locks", hashlib.sha1(name.encode("utf-8")).hexdigest() + ".lock")
+
+
+def lease(stage: str, key: str, timeout: Optional[float] = None) -> Lease:
+    """
+    Block until (stage, key) is free in every thread and process, then hold it.
+    After `timeout` seconds (default SINGLEFLIGHT_TIMEOUT) an un-held lease is
+    returned instead of raising, so callers proceed without coordination.
+    """
+    name = _name(stage, key)
+    if not cfg.SINGLEFLIGHT_ENABLED:
+        return Lease(name, held=False)
+    timeout = cfg.SINGLEFLIGHT_TIMEOUT if timeout is None else timeout
+
+    if fcntl is None:
+        with _lock:
+            local = _local_locks.setdefault(name, threading.Lock())
+        if local.acquire(timeout=timeout):
+            return Lease(name, local=local)
+        metrics.inc("singleflight_timeouts_total", stage=stage)
+        return Lease(name, held=False)
+
+    path = _lock_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    waited = False
+    while True:
+        try:
+            # flock locks belong to the open file description, so this also
+            # excludes other threads of this process (each opens its own fd)
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if waited:
+                metrics.inc("singleflight_waits_total", stage=stage)
+            return Lease(name, fd=fd)
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                metrics.inc("singleflight_timeouts_total", stage=stage)
+                return Lease(name, held=False)
+            waited = True
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+
+def do(stage: str, key: str, fn: Callable[[], T]) -> T:
+    """Run fn once per (stage, key) at a time; concurrent callers share its outcome."""
+    if not cfg.SINGLEFLIGHT_ENABLED:
+        return fn()
+    name = _name(stage, key)
+    with _lock:
+        call = _calls.get(name)
+        leader = call is None
+        if leader:
+            call = _calls[name] = _Call()
+
+    if not leader:
+        metrics.inc("singleflight_coalesced_total", stage=stage)
+        if not call.done.wait(cfg.SINGLEFLIGHT_TIMEOUT):
+            metrics.inc("singleflight_timeouts_total", stage=stage)
+            return fn()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        with lease(stage, key):
+            call.result = fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _calls.pop(name, None)
+        call.done.set()
+
+
+__all__ = ["Lease", "lease", "do"]
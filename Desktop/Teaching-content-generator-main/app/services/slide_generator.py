@@ -0,0 +1,96 @@
+from __future__ import annotations
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Union
+
+import app.config as cfg
+from app.services.llm_service import generate_slide_content
+from app.services.context_packer import pack_context
+from app.services.rag_service import retrieve_many
+
+# Per-slide generation: parse the plan into slide items, retrieve context per
+# slide and generate slides concurrently on a bounded pool, then reassemble in
+# plan order. Deck latency ~ the slowest slide instead of the sum of all slides.
+
+_SLIDE_HEADING_RE = re.compile(
+    r"""^\s*
+    (?:\#{1,6}\s*)?(?:\*\*)?\s*                           # optional markdown heading / bold
+    slide\s*\d+\s*[:.)\-–—]\s*                            # "Slide 3:"
+    (?P<title>.+?)\s*(?:\*\*)?\s*:?\s*$
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_MARKDOWN_HEADING_RE = re.compile(r"^\s*#{1,6}\s*(?P<title>.+?)\s*$")
+_NUMBERED_RE = re.compile(r"^\s*(?:\*\*)?\s*\d+\s*[.)]\s+(?P<title>.+?)\s*(?:\*\*)?\s*:?\s*$")  # "3." / "3)"
+
+def _heading(line: str, numbered: bool):
+    m = _SLIDE_HEADING_RE.match(line) or _MARKDOWN_HEADING_RE.match(line)
+    if m is None and numbered:
+        m = _NUMBERED_RE.match(line)
+    return m
+
+def parse_plan_items(plan: Union[str, List[Any]]) -> List[Dict[str, str]]:
+    """
+    Normalize a plan into [{"title": "...", "description": "..."}, ...].
+    - list input: items as produced by plan generation ({"title", "description"}) or plain strings
+    - text input: "Slide N: Title" / "## Title" headings, following lines are the description;
+      "N. Title" lines start slides only in plans without such headings (otherwise they
+      are numbered key points and stay in the description)
+    """
+    if isinstance(plan, list):
+        items = []
+        for it in plan:
+            if isinstance(it, dict):
+                items.append({"title": str(it.get("title") or "").strip(), "description": str(it.get("description") or "").strip()})
+            else:
+                items.append({"title": str(it).strip(), "description": ""})
+        return [i for i in items if i["title"] or i["description"]]
+
+    lines = (plan or "").splitlines()
+    numbered = not any(_heading(line, numbered=False) for line in lines)
+    items: List[Dict[str, str]] = []
+    desc: List[str] = []
+    for line in lines:
+        m = _heading(line, numbered)
+        if m:
+            if items:
+                items[-1]["description"] = "\n".join(desc).strip()
+            items.append({"title": m.group("title").strip("*: ").strip(), "description": ""})
+            desc = []
+        elif line.strip():
+            desc.append(line.strip())
+    if items:
+        items[-1]["description"] = "\n".join(desc).strip()
+        return items
+    # no recognizable headings: one slide per non-empty line
+    return [{"title": l, "description": ""} for l in desc]
+
+def generate_slides_parallel(
+    topic: str,
+    plan: Union[str, List[Any]],
+    yt_link: str,
+    max_workers: int = cfg.SLIDE_WORKERS,
+) -> List[Dict[str, Any]]:
+    """
+    Returns: [{"index": 0, "title": "...", "content": "..."}, ...] in plan order.
+    """
+    items = parse_plan_items(plan)
+    if not items:
+        raise ValueError("Could not find any slides in the plan")
+
+    # one batched retrieval for the whole deck (one encode, one matrix product)
+    queries = [f"{topic}: {it['title']}. {it['description']}".strip() for it in items]
+    contexts = [pack_context(hits, cfg.SLIDE_CONTEXT_TOKEN_BUDGET).text for hits in retrieve_many(yt_link, queries)]
+
+    def work(i: int) -> Dict[str, Any]:
+        item = items[i]
+        context = contexts[i]
+        content = generate_slide_content(topic, item["title"], item["description"], context, index=i, total=len(items))
+        return {"index": i, "title": item["title"], "content": content}
+
+    workers = max(1, min(max_workers, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(work, range(len(items))))
+
+
+__all__ = ["parse_plan_items", "generate_slides_parallel"]
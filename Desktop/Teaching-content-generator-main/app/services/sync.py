@@ -0,0 +1,109 @@
+from __future__ import annotations
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+import app.config as cfg
+from app.services import singleflight
+from app.services.embedded import EmbeddedChunks
+from app.services.model_registry import embedding_model_key
+from app.services.vector_store import VectorStore, get_vector_store, video_namespace
+
+# Incremental re-ingestion. chunk_id is content-addressed, so diffing the new
+# chunk-id set against the ids already stored for video:{id} (tracked in a local
+# manifest, one file per namespace) tells us exactly which vectors to add and
+# which to delete; unchanged chunks are neither re-embedded nor re-sent.
+# The manifest's header names the store and embedding model it describes; after
+# switching either, the stored contents are unknown and the namespace is rewritten.
+
+
+# --- Manifest ----------------------------------------------------------------------
+def _manifest_path(namespace: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", namespace)
+    return os.path.join(cfg.CACHE_PATH, "manifests", safe + ".txt")
+
+def _manifest_header() -> str:
+    return f"# store={cfg.VECTOR_BACKEND}:{cfg.VECTOR_DB_NAME} model={embedding_model_key()}\n"
+
+def load_manifest(namespace: str) -> Optional[Set[str]]:
+    """Chunk ids stored in a namespace, or None if it was never synced (with this store/model)."""
+    try:
+        with open(_manifest_path(namespace), "r", encoding="utf-8") as f:
+            if f.readline() != _manifest_header():
+                return None
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return None
+
+def save_manifest(namespace: str, ids: Set[str]) -> None:
+    path = _manifest_path(namespace)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(_manifest_header() + "".join(f"{cid}\n" for cid in sorted(ids)))
+    os.replace(tmp, path)
+
+
+# --- Plan / apply ----------------------------------------------------------------------
+@dataclass
+class SyncPlan:
+    video_id: str
+    new_ids: Set[str]
+    to_embed: List[Dict[str, Any]]   # chunks that must be embedded + upserted
+    removed: Optional[List[str]]     # ids to delete; None = unknown, wipe namespace first
+    unchanged: int
+
+def plan_sync(video_id: str, chunks: List[Dict[str, Any]], incremental: bool = True) -> SyncPlan:
+    ns = video_namespace(video_id)
+    old = load_manifest(ns)
+    seen: Set[str] = set()
+    unique = []
+    for c in chunks:
+        if c["id"] not in seen:
+            seen.add(c["id"])
+            unique.append(c)
+
+    if old is None:
+        # never synced with a manifest: contents unknown, so rewrite the namespace
+        return SyncPlan(video_id, seen, unique, None, 0)
+    removed = sorted(old - seen)
+    if not incremental:
+        return SyncPlan(video_id, seen, unique, removed, 0)
+    added = [c for c in unique if c["id"] not in old]
+    return SyncPlan(video_id, seen, added, removed, len(unique) - len(added))
+
+def apply_sync(plan: SyncPlan, embedded: EmbeddedChunks, store: Optional[VectorStore] = None) -> Dict[str, int]:
+    """
+    Upsert the embedded additions, then delete removed ids, then record the manifest.
+    (Adds before deletes, so queries never see a half-empty namespace.)
+    """
+    store = store or get_vector_store()
+    if plan.removed is None:
+        store.delete_by_video(plan.video_id)
+    upserted = store.upsert_chunks(plan.video_id, embedded) if len(embedded) else 0
+    deleted = store.delete_ids(plan.video_id, plan.removed) if plan.removed else 0
+    save_manifest(video_namespace(plan.video_id), plan.new_ids)
+    return {"upserted": upserted, "deleted": deleted, "unchanged": plan.unchanged}
+
+def sync_video(
+    video_id: str,
+    chunks: List[Dict[str, Any]],
+    incremental: bool = True,
+    store: Optional[VectorStore] = None,
+) -> Dict[str, int]:
+    """
+    Bring video:{id} in line with `chunks`, embedding only what is new.
+    Holds the video's "sync" lease, so a concurrent sync/ingest of the same video
+    finishes first and this one then diffs against its manifest.
+    """
+    from app.services.embeddings import embed_chunks
+
+    with singleflight.lease("sync", video_id):
+        plan = plan_sync(video_id, chunks, incremental=incremental)
+        embedded = embed_chunks(plan.to_embed) if plan.to_embed else EmbeddedChunks.empty(0)
+        return apply_sync(plan, embedded, store=store)
+
+
+__all__ = ["SyncPlan", "plan_sync", "apply_sync", "sync_video", "load_manifest", "save_manifest"]
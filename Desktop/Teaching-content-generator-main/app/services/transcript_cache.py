@@ -0,0 +1,47 @@
+from __future__ import annotations
+import os
+from typing import Any, Dict, Optional
+
+import app.config as cfg
+from app.services import metrics
+from app.services.disk_cache import DiskCache
+
+# Disk-backed transcript cache keyed by (video_id, language).
+# Sits in front of youtube.get_transcript_text (transcript_service.fetch_transcript goes
+# through it too, so there is a single record per key) and lets repeat requests skip
+# both the YouTube fetch and the LibreTranslate round trips.
+
+_cache: DiskCache | None = None
+
+def _get_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(
+            os.path.join(cfg.CACHE_PATH, "transcripts"),
+            max_bytes=cfg.TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024,
+            ttl=cfg.TRANSCRIPT_CACHE_TTL,
+        )
+    return _cache
+
+def _key(video_id: str, language: str) -> str:
+    return f"{video_id}:{(language or '').lower()}"
+
+def load(video_id: str, language: str) -> Optional[Dict[str, Any]]:
+    """Return the cached transcript record, or None on miss/expiry."""
+    if not cfg.TRANSCRIPT_CACHE_ENABLED:
+        return None
+    record = _get_cache().get(_key(video_id, language))
+    metrics.cache_access("transcript", record is not None)
+    return record
+
+def store(video_id: str, language: str, record: Dict[str, Any]) -> None:
+    """Persist a transcript record ({'video_id', 'language', 'text', ...})."""
+    if not cfg.TRANSCRIPT_CACHE_ENABLED:
+        return
+    _get_cache().set(_key(video_id, language), record)
+
+def invalidate(video_id: str, language: str) -> None:
+    _get_cache().delete(_key(video_id, language))
+
+
+__all__ = ["load", "store", "invalidate"]
@@ -1,5 +1,5 @@
-from youtube_transcript_api import YouTubeTranscriptApi
 from urllib.parse import urlparse, parse_qs
+from app.services import youtube
 
 def extract_video_id(url):
     parsed = urlparse(url)
@@ -9,5 +9,5 @@ def fetch_transcript(yt_link):
     video_id = extract_video_id(yt_link)
     if not video_id:
         raise ValueError("Invalid YouTube URL")
-    transcript = YouTubeTranscriptApi.get_transcript(video_id)
-    return " ".join([x['text'] for x in transcript])
+    # one fetch path, one cached record per (video_id, language): see youtube.get_transcript_text
+    return youtube.get_transcript_text(video_id)["text"]
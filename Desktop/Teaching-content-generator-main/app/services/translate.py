@@ -1,6 +1,17 @@
-import requests
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
 import app.config as cfg
+from app.services import metrics
+from app.services.disk_cache import DiskCache
 
 def _split_for_api(text: str, max_len: int = 4500) -> List[str]:
     """
@@ -22,34 +33,107 @@ def _split_for_api(text: str, max_len: int = 4500) -> List[str]:
         parts.append(" ".join(buf))
     return parts
 
+# --- Client -------------------------------------------------------------------
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_session: Optional[requests.Session] = None
+_cache: Optional[DiskCache] = None
+_init_lock = threading.Lock()
+
+def _get_session() -> requests.Session:
+    """One pooled Session per process (keep-alive across pieces and requests)."""
+    global _session
+    with _init_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, cfg.LT_MAX_CONCURRENCY))
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers.update({"Accept": "application/json"})
+            _session = s
+        return _session
+
+def _get_cache() -> DiskCache:
+    global _cache
+    with _init_lock:
+        if _cache is None:
+            _cache = DiskCache(
+                os.path.join(cfg.CACHE_PATH, "translations"),
+                max_bytes=cfg.TRANSLATION_CACHE_MAX_MB * 1024 * 1024,
+            )
+        return _cache
+
+def _cache_key(piece: str, source: str) -> str:
+    return f"{source}:{hashlib.sha256(piece.encode('utf-8')).hexdigest()}"
+
+def _backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), cfg.LT_BACKOFF_MAX)
+        except ValueError:
+            pass
+    delay = cfg.LT_BACKOFF_BASE * (2 ** attempt)
+    return min(delay, cfg.LT_BACKOFF_MAX) * (0.5 + random.random() / 2)  # jitter
+
+def _translate_piece(piece: str, source: str) -> str:
+    """Translate one API-sized piece: cache -> POST with retry/backoff on 429/5xx -> cache."""
+    cache = _get_cache() if cfg.TRANSLATION_CACHE_ENABLED else None
+    key = _cache_key(piece, source)
+    if cache is not None:
+        hit = cache.get(key)
+        metrics.cache_access("translation", hit is not None)
+        if hit is not None:
+            return hit
+
+    endpoint = cfg.LT_URL.rstrip("/") + "/translate"
+    payload = {"q": piece, "source": source, "target": "en", "format": "text"}
+    if cfg.LT_API_KEY:
+        payload["api_key"] = cfg.LT_API_KEY
+
+    session = _get_session()
+    for attempt in range(cfg.LT_MAX_RETRIES + 1):
+        last = attempt == cfg.LT_MAX_RETRIES
+        try:
+            resp = session.post(endpoint, json=payload, timeout=cfg.LT_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+        if resp.status_code in _RETRY_STATUS and not last:
+            time.sleep(_backoff(attempt, resp.headers.get("Retry-After")))
+            continue
+        if attempt:
+            metrics.inc("translate_retries_total", attempt)
+        resp.raise_for_status()
+        translated = resp.json().get("translatedText", "")
+        if cache is not None:
+            cache.set(key, translated)
+        return translated
+    raise RuntimeError("unreachable")  # loop always returns or raises
+
+@metrics.timed("translate")
 def translate_to_english(text: str, source_lang: Optional[str] = None) -> str:
     """
     Translate arbitrary text to English using LibreTranslate.
     - Uses cfg.LT_URL and optional cfg.LT_API_KEY
     - If source_lang is None, LibreTranslate will auto-detect.
+    - Pieces are sent concurrently (LT_MAX_CONCURRENCY) over a pooled session,
+      reassembled in order, and cached per (source lang, piece hash).
     """
     if not text.strip():
         return text
 
-    endpoint = cfg.LT_URL.rstrip("/") + "/translate"
-    headers = {"Accept": "application/json"}
-    api_key = cfg.LT_API_KEY or None
-
+    source = source_lang if source_lang else "auto"
     chunks = _split_for_api(text)
-    translated_parts = []
-
-    for chunk in chunks:
-        payload = {
-            "q": chunk,
-            "source": source_lang if source_lang else "auto",
-            "target": "en",
-            "format": "text",
-        }
-        if api_key:
-            payload["api_key"] = api_key
-        resp = requests.post(endpoint, json=payload, headers=headers, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        translated_parts.append(data.get("translatedText", ""))
+    metrics.observe("translate_pieces", len(chunks))
+
+    if len(chunks) == 1:
+        translated_parts = [_translate_piece(chunks[0], source)]
+    else:
+        workers = max(1, min(cfg.LT_MAX_CONCURRENCY, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            translated_parts = list(ex.map(lambda c: _translate_piece(c, source), chunks))
 
-    return " ".join(translated_parts).strip()
\ No newline at end of file
+    return " ".join(translated_parts).strip()
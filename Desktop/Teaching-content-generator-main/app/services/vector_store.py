@@ -0,0 +1,470 @@
+from __future__ import annotations
+import os
+import re
+import tempfile
+import threading
+import heapq
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+import app.config as cfg
+from app.services import mmr, pinecone_index
+from app.services.embedded import EmbeddedChunks, as_embedded
+from app.services.retrieval_index import normalize_rows, top_k_indices, top_k_rows
+
+try:  # cross-process writer lock for the local backend (POSIX); thread lock only elsewhere
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Pluggable vector store. Same surface as pinecone_index:
+#   upsert_chunks(video_id, embedded_chunks, namespace=None) -> int
+#   query(vector, namespace, top_k, include_metadata) -> [{"id", "score", "text"?}]
+#     (MMR re-ranked when cfg.USE_MMR; backends implement the plain search as _query)
+#   delete_by_video(video_id)
+# Namespaces are per video: f"video:{video_id}".
+
+EMBED_DIM = pinecone_index.EMBED_DIM
+
+
+def video_namespace(video_id: str) -> str:
+    return f"video:{video_id}"
+
+def dedupe_ranked(results: List[List[Dict[str, Any]]], top_k: int) -> List[List[Dict[str, Any]]]:
+    """Greedy cross-query de-duplication of ranked match lists (earlier queries win)."""
+    used = set()
+    out = []
+    for matches in results:
+        kept = [m for m in matches if m["id"] not in used][:top_k]
+        used.update(m["id"] for m in kept)
+        out.append(kept)
+    return out
+
+
+class VectorStore(ABC):
+    """Interface implemented by the Pinecone and local backends."""
+
+    @abstractmethod
+    def upsert_chunks(
+        self,
+        video_id: str,
+        embedded_chunks: EmbeddedChunks,
+        namespace: Optional[str] = None,
+    ) -> int:
+        """Insert or overwrite chunks by id; returns the number written."""
+
+    def query(
+        self,
+        vector: np.ndarray,
+        namespace: str,
+        top_k: int = cfg.TOP_K,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        use_mmr: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k matches: [{"id", "score", "text"?, "vector"?}]. With MMR (default:
+        cfg.USE_MMR) they are diversified by query_mmr, else best cosine first.
+        """
+        if cfg.USE_MMR if use_mmr is None else use_mmr:
+            return self.query_mmr(
+                vector, namespace, top_k=top_k, include_metadata=include_metadata, include_values=include_values
+            )
+        return self._query(vector, namespace, top_k, include_metadata, include_values)
+
+    def query_mmr(
+        self,
+        vector: np.ndarray,
+        namespace: str,
+        top_k: int = cfg.TOP_K,
+        lambda_mult: float = cfg.MMR_LAMBDA,
+        include_metadata: bool = True,
+        include_values: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Over-fetch candidates with their vectors, then MMR re-rank them down to top_k."""
+        matches = self._query(vector, namespace, mmr.fetch_k(top_k), include_metadata, True)
+        if not matches:
+            return []
+        picked = mmr.mmr_select(vector, np.stack([m["vector"] for m in matches]), top_k, lambda_mult)
+        out = [matches[i] for i in picked]
+        if not include_values:
+            for m in out:
+                m.pop("vector", None)
+        return out
+
+    @abstractmethod
+    def _query(
+        self,
+        vector: np.ndarray,
+        namespace: str,
+        top_k: int,
+        include_metadata: bool,
+        include_values: bool,
+    ) -> List[Dict[str, Any]]:
+        """Top-k cosine matches: [{"id", "score", "text"?, "vector"?}], best first."""
+
+    def query_many(
+        self,
+        vectors: np.ndarray,
+        namespace: str,
+        top_k: int = cfg.TOP_K,
+        include_metadata: bool = True,
+        dedupe: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Several queries against one namespace. Default: concurrent single queries
+        (network backends); the local backend overrides this with one matrix product.
+        dedupe=True hands each id to at most one query (earlier queries win).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, EMBED_DIM)
+        fetch = top_k * len(vectors) if dedupe else top_k
+        workers = max(1, min(cfg.VECTOR_QUERY_CONCURRENCY, len(vectors)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(
+                lambda v: self.query(v, namespace, top_k=fetch, include_metadata=include_metadata), vectors
+            ))
+        return dedupe_ranked(results, top_k) if dedupe else results
+
+    def query_across(
+        self,
+        vector: np.ndarray,
+        video_ids: List[str],
+        top_k: int = cfg.TOP_K,
+        include_metadata: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query several video namespaces concurrently and merge with a heap-based
+        global top_k. Each match carries its source "video_id".
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        if not video_ids:
+            return []
+
+        def one(vid: str) -> List[Dict[str, Any]]:
+            matches = self.query(vector, video_namespace(vid), top_k=top_k, include_metadata=include_metadata)
+            for m in matches:
+                m["video_id"] = vid
+            return matches
+
+        workers = max(1, min(cfg.VECTOR_QUERY_CONCURRENCY, len(video_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            per_video = list(ex.map(one, video_ids))
+        return heapq.nlargest(top_k, (m for matches in per_video for m in matches), key=lambda m: m["score"])
+
+    @abstractmethod
+    def delete_by_video(self, video_id: str) -> None:
+        """Drop every chunk of the video's namespace."""
+
+    @abstractmethod
+    def delete_ids(self, video_id: str, ids: List[str], namespace: Optional[str] = None) -> int:
+        """Drop the given chunk ids; returns how many were removed (if known)."""
+
+
+# --- Pinecone backend -----------------------------------------------------------
+class PineconeVectorStore(VectorStore):
+    def upsert_chunks(self, video_id, embedded_chunks, namespace=None):
+        return pinecone_index.upsert_chunks(video_id, embedded_chunks, namespace=namespace)
+
+    def _query(self, vector, namespace, top_k, include_metadata, include_values):
+        return pinecone_index.query(
+            vector, namespace, top_k=top_k, include_metadata=include_metadata, include_values=include_values
+        )
+
+    def delete_by_video(self, video_id):
+        pinecone_index.delete_by_video(video_id)
+
+    def delete_ids(self, video_id, ids, namespace=None):
+        return pinecone_index.delete_ids(video_id, list(ids), namespace=namespace)
+
+
+# --- Local backend ----------------------------------------------------------------
+class _IVF:
+    """
+    Inverted-file ANN index over normalized rows: spherical k-means centroids,
+    rows grouped per list (CSR layout). Search scans the nprobe closest lists.
+    """
+
+    def __init__(self, matrix: np.ndarray, nlist: int, iters: int = 8, seed: int = 0):
+        n = matrix.shape[0]
+        rng = np.random.default_rng(seed)
+        sample = matrix[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=nlist) == 0
+            sums[empty] = centroids[empty]  # keep old centroid for empty lists
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 65536):  # bound the (rows x nlist) temp
+            block = np.asarray(matrix[start:start + 65536])
+            assign[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=nlist))))
+
+    def candidates(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        lists = top_k_indices(self.centroids @ q, nprobe)
+        return np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+
+_GEN_FILE = re.compile(r"^(?:vectors|meta)-([0-9a-f]{12})\.(?:npy|npz)$")
+
+
+class _Generation:
+    """One published namespace state; never mutated, so a query reads one consistent snapshot."""
+
+    def __init__(self, name: Optional[str] = None, ids=(), texts=(), matrix: Optional[np.ndarray] = None):
+        self.name = name
+        self.ids: List[str] = list(ids)
+        self.texts: List[str] = list(texts)
+        self.rows: Dict[str, int] = {cid: i for i, cid in enumerate(self.ids)}
+        self.matrix = np.empty((0, EMBED_DIM), dtype=np.float32) if matrix is None else matrix
+        self.ivf: Optional[_IVF] = None  # built lazily, per generation
+
+
+class _Namespace:
+    """
+    One namespace on disk: generation-stamped vectors .npy + ids/texts .npz, and a CURRENT pointer.
+    Writers hold a thread lock plus an flock on <dir>/.lock from refresh to publish and
+    build the new generation's files without blocking readers; `switch_lock` (shared with
+    readers) is held only to swap CURRENT. A publish keeps the previous generation's files
+    (a reader may have just read CURRENT) and removes older ones.
+    """
+
+    def __init__(self, directory: str, switch_lock: threading.RLock):
+        self.directory = directory
+        self.current = _Generation()
+        self._switch_lock = switch_lock
+        self._write_lock = threading.Lock()
+
+    def _pointer(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, "CURRENT"), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def refresh(self) -> _Generation:
+        """Reload if another writer (thread or process) published a new generation."""
+        for _ in range(5):
+            gen = self._pointer()
+            if gen == self.current.name:
+                return self.current
+            if gen is None:
+                self.current = _Generation()
+                return self.current
+            try:
+                matrix = np.load(os.path.join(self.directory, f"vectors-{gen}.npy"), mmap_mode="r")
+                with np.load(os.path.join(self.directory, f"meta-{gen}.npz"), allow_pickle=False) as meta:
+                    ids = meta["ids"].tolist()
+                    texts = meta["texts"].tolist()
+            except FileNotFoundError:
+                continue  # superseded twice since we read CURRENT: read it again
+            self.current = _Generation(gen, ids, texts, matrix)
+            return self.current
+        raise RuntimeError(f"Vector namespace {self.directory} kept changing while loading")
+
+    @contextmanager
+    def writing(self) -> Iterator[_Generation]:
+        """Exclusive across processes; yields the latest generation to build the next one from."""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._write_lock, open(os.path.join(self.directory, ".lock"), "a") as lockf:
+            if fcntl is not None:
+                fcntl.flock(lockf, fcntl.LOCK_EX)
+            try:
+                with self._switch_lock:
+                    cur = self.refresh()
+                yield cur
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lockf, fcntl.LOCK_UN)
+
+    def publish(self, ids: List[str], texts: List[str], matrix: np.ndarray) -> None:
+        """Write a new generation and switch CURRENT to it (call inside writing())."""
+        previous = self._pointer()
+        gen = uuid.uuid4().hex[:12]
+        np.save(os.path.join(self.directory, f"vectors-{gen}.npy"), np.ascontiguousarray(matrix, dtype=np.float32))
+        np.savez(
+            os.path.join(self.directory, f"meta-{gen}.npz"),
+            ids=np.array(ids, dtype=str),
+            texts=np.array(texts, dtype=str),
+        )
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(gen)
+        with self._switch_lock:
+            os.replace(tmp, os.path.join(self.directory, "CURRENT"))
+            self.refresh()
+        keep = {gen, previous}
+        for name in os.listdir(self.directory):
+            m = _GEN_FILE.match(name)
+            if m and m.group(1) not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass  # may still be mapped on Windows; removed by a later publish
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process store: one memory-mapped float32 matrix per namespace, exact
+    vectorized cosine search, plus optional IVF search for large namespaces.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(cfg.CACHE_PATH, "vectors")
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+
+    def _ns(self, namespace: str) -> _Namespace:
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", namespace)
+                ns = _Namespace(os.path.join(self.directory, safe), self._lock)
+                self._namespaces[namespace] = ns
+            return ns
+
+    def _snapshot(self, namespace: str) -> _Generation:
+        """The namespace's latest generation; callers use only this object for the whole query."""
+        with self._lock:
+            return self._ns(namespace).refresh()
+
+    def upsert_chunks(self, video_id, embedded_chunks, namespace=None):
+        embedded = as_embedded(embedded_chunks, EMBED_DIM)
+        if not len(embedded):
+            return 0
+        if embedded.dim != EMBED_DIM:
+            raise ValueError(f"Vector dim mismatch (expected {EMBED_DIM}, got {embedded.dim})")
+        last = {cid: i for i, cid in enumerate(embedded.ids)}  # repeated id in the batch: last row wins
+        if len(last) < len(embedded):
+            embedded = embedded.take(sorted(last.values()))
+        vectors = normalize_rows(embedded.vectors)
+
+        ns = self._ns(namespace or video_namespace(video_id))
+        with ns.writing() as cur:
+            ids, texts = list(cur.ids), list(cur.texts)
+            rows = dict(cur.rows)
+            matrix = np.array(cur.matrix, dtype=np.float32)  # copy out of the mmap
+            append_rows: List[int] = []
+            for i, (cid, text) in enumerate(zip(embedded.ids, embedded.texts)):
+                r = rows.get(cid)
+                if r is None:
+                    rows[cid] = len(ids)
+                    ids.append(cid)
+                    texts.append(text)
+                    append_rows.append(i)
+                else:
+                    matrix[r] = vectors[i]
+                    texts[r] = text
+            if append_rows:
+                matrix = np.vstack([matrix, vectors[append_rows]])
+            ns.publish(ids, texts, matrix)
+        return len(embedded)
+
+    def _query(self, vector, namespace, top_k, include_metadata, include_values):
+        q = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if q.shape[0] != EMBED_DIM:
+            raise ValueError(f"Query vector must be {EMBED_DIM}-dim")
+        q = q / (np.linalg.norm(q) or 1.0)
+
+        snap = self._snapshot(namespace)
+        n = len(snap.ids)
+        if n == 0:
+            return []
+        if cfg.LOCAL_ANN and n >= cfg.LOCAL_ANN_MIN_VECTORS:
+            with self._lock:
+                if snap.ivf is None:
+                    snap.ivf = _IVF(snap.matrix, nlist=max(1, int(np.sqrt(n))))
+            cand = snap.ivf.candidates(q, cfg.LOCAL_ANN_NPROBE)
+            scores = np.asarray(snap.matrix[cand]) @ q
+            picked = top_k_indices(scores, top_k)
+            rows, row_scores = cand[picked], scores[picked]
+        else:
+            scores = np.asarray(snap.matrix) @ q
+            rows = top_k_indices(scores, top_k)
+            row_scores = scores[rows]
+
+        out: List[Dict[str, Any]] = []
+        for r, s in zip(rows, row_scores):
+            item = {"id": snap.ids[r], "score": float(s)}
+            if include_metadata:
+                item["text"] = snap.texts[r]
+            if include_values:
+                item["vector"] = np.array(snap.matrix[r])
+            out.append(item)
+        return out
+
+    def query_many(self, vectors, namespace, top_k=cfg.TOP_K, include_metadata=True, dedupe=False):
+        Q = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(-1, EMBED_DIM))
+        snap = self._snapshot(namespace)
+        if not snap.ids:
+            return [[] for _ in range(len(Q))]
+        scores = Q @ np.asarray(snap.matrix).T  # exact, one (m, dim) x (dim, n) product
+        rows = top_k_rows(scores, top_k * len(Q) if dedupe else top_k)
+        results = []
+        for qi, per_query in enumerate(rows):
+            items = []
+            for r in per_query:
+                item = {"id": snap.ids[r], "score": float(scores[qi, r])}
+                if include_metadata:
+                    item["text"] = snap.texts[r]
+                items.append(item)
+            results.append(items)
+        return dedupe_ranked(results, top_k) if dedupe else results
+
+    def delete_by_video(self, video_id):
+        ns = self._ns(video_namespace(video_id))
+        with ns.writing() as cur:
+            if cur.ids:
+                ns.publish([], [], np.empty((0, EMBED_DIM), dtype=np.float32))
+
+    def delete_ids(self, video_id, ids, namespace=None):
+        drop = set(ids)
+        ns = self._ns(namespace or video_namespace(video_id))
+        with ns.writing() as cur:
+            keep = [r for r, cid in enumerate(cur.ids) if cid not in drop]
+            removed = len(cur.ids) - len(keep)
+            if removed:
+                ns.publish(
+                    [cur.ids[r] for r in keep],
+                    [cur.texts[r] for r in keep],
+                    np.asarray(cur.matrix[keep], dtype=np.float32).reshape(len(keep), EMBED_DIM),
+                )
+        return removed
+
+
+# --- Factory -----------------------------------------------------------------------
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+def get_vector_store() -> VectorStore:
+    """Process-wide store selected by cfg.VECTOR_BACKEND ("pinecone" | "local")."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = (cfg.VECTOR_BACKEND or "pinecone").lower()
+            if backend == "local":
+                _store = LocalVectorStore()
+            elif backend == "pinecone":
+                _store = PineconeVectorStore()
+            else:
+                raise ValueError(f"Unknown VECTOR_BACKEND: {cfg.VECTOR_BACKEND!r}")
+        return _store
+
+
+__all__ = [
+    "VectorStore",
+    "PineconeVectorStore",
+    "LocalVectorStore",
+    "get_vector_store",
+    "video_namespace",
+    "dedupe_ranked",
+]
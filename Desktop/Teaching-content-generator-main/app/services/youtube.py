@@ -1,6 +1,8 @@
 import re
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import app.config as cfg
+from app.services import metrics, segment_store, singleflight, transcript_cache
+from app.services.segment_store import SegmentStore
 from app.services.translate import translate_to_english
 
 try:
@@ -71,36 +73,58 @@ def _pick_best_transcript(video_id: str, language_preference: Optional[List[str]
 
     raise NoTranscriptFound(video_id)
 
-def _normalize_segments(segments: List[Dict]) -> str:
-    text_parts = [seg.get("text", "") for seg in segments if seg.get("text")]
-    raw = " ".join(text_parts)
-    cleaned = " ".join(raw.split())
-    return cleaned.strip()
+def _normalize_segments(video_id: str, segments: List[Dict]) -> SegmentStore:
+    """Segments -> SegmentStore (timings kept); its .text is the cleaned transcript."""
+    return SegmentStore.from_segments(video_id, segments)
 
+@metrics.timed("transcript")
 def get_transcript_text(url_or_id: str) -> Dict[str, str]:
     """
     - Prefer English transcript.
     - If English is not available, fetch any transcript and translate to English via LibreTranslate.
+    - Results are cached on disk per (video_id, language); repeat calls skip the network,
+      and concurrent calls for the same video share one fetch.
+    - Segment timings are kept in the segment store (see segment_store.load).
     - Returns: {'video_id': '...', 'language': 'en', 'text': '...'}
     """
     video_id = extract_video_id(url_or_id)
+    cached = transcript_cache.load(video_id, cfg.PREFERRED_LANGUAGE)
+    if cached is not None and segment_store.exists(video_id):
+        return cached
+
+    def fetch():
+        # another process may have filled the cache while we waited for the lease
+        cached = transcript_cache.load(video_id, cfg.PREFERRED_LANGUAGE)
+        if cached is not None and segment_store.exists(video_id):
+            return cached
+        result, segments = _fetch_transcript_text(video_id)
+        segment_store.store(segments)
+        transcript_cache.store(video_id, cfg.PREFERRED_LANGUAGE, result)
+        return result
+
+    return singleflight.do("transcript_record", video_id, fetch)
+
+@metrics.timed("transcript_fetch")
+def _fetch_transcript_text(video_id: str) -> Tuple[Dict[str, str], SegmentStore]:
+    """Returns (transcript record, its segment timings)."""
     try:
         # Try preferred English first
         tr = _pick_best_transcript(video_id, language_preference=[cfg.PREFERRED_LANGUAGE])
-        segments = tr.fetch()
-        text = _normalize_segments(segments)
+        segments = _normalize_segments(video_id, tr.fetch())
+        text = segments.text
 
-        # If transcript language isn't English, translate it
+        # If transcript language isn't English, translate it (timings map approximately)
         final_language = tr.language_code
         if (final_language or "").lower() != "en":
             text = translate_to_english(text, source_lang=final_language)
+            segments = segments.retext(text)
             final_language = "en"
 
         return {
             "video_id": video_id,
             "language": final_language,
             "text": text,
-        }
+        }, segments
 
     except TranscriptsDisabled:
         raise RuntimeError("Transcripts are disabled for this video.")
@@ -108,14 +132,13 @@ def get_transcript_text(url_or_id: str) -> Dict[str, str]:
         # Try: any available language → translate to English
         try:
             tr_any = _pick_best_transcript(video_id, language_preference=None)
-            segments = tr_any.fetch()
-            text_any = _normalize_segments(segments)
-            text_en = translate_to_english(text_any, source_lang=tr_any.language_code)
+            segments = _normalize_segments(video_id, tr_any.fetch())
+            text_en = translate_to_english(segments.text, source_lang=tr_any.language_code)
             return {
                 "video_id": video_id,
                 "language": "en",
                 "text": text_en,
-            }
+            }, segments.retext(text_en)
         except Exception as e:
             raise RuntimeError(f"No transcript available in any language: {e}") from e
     except Exception as e:
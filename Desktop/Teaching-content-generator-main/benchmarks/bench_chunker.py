@@ -0,0 +1,42 @@
+"""
+Compare the single-pass token-offset chunker with the LangChain recursive splitter.
+
+    python -m benchmarks.bench_chunker [--hours 1 2 4] [--repeat 3]
+"""
+import argparse
+import statistics
+import time
+
+from app.services import chunker
+from benchmarks.synthetic import transcript_text
+
+
+def _time(fn, text, repeat):
+    runs = []
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(text)
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs), out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--hours", type=float, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'hours':>5} {'tokens':>8} | {'offsets s':>9} {'chunks':>6} | {'recursive s':>11} {'chunks':>6} | speedup")
+    for hours in args.hours:
+        text = chunker.normalize_text(transcript_text(hours * 60))
+        n_tokens = chunker.count_tokens(text)
+        t_new, new = _time(chunker.make_chunks, text, args.repeat)
+        t_old, old = _time(chunker.make_chunks_recursive, text, args.repeat)
+        print(
+            f"{hours:>5g} {n_tokens:>8} | {t_new:>9.3f} {len(new):>6} | {t_old:>11.3f} {len(old):>6} | {t_old / t_new:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
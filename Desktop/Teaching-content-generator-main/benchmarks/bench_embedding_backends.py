@@ -0,0 +1,68 @@
+"""
+Accuracy and throughput of the embedding backends (torch / onnx / onnx-int8).
+
+Accuracy is measured against the full-precision torch model:
+  - vector cosine: cos(backend(x), reference(x)) per sentence
+  - pair drift:    |cos_backend(a, b) - cos_reference(a, b)| over sentence pairs
+    (what retrieval ranking actually depends on)
+Throughput is sentences/second through model.encode on this machine.
+
+    python -m benchmarks.bench_embedding_backends [--sentences 2000] [--backends torch onnx onnx-int8]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.chunker import normalize_text
+from app.services.model_registry import EMBEDDING_BACKENDS, load_embedding_model
+from benchmarks.synthetic import transcript_segments
+
+
+def _sentences(n):
+    segs = transcript_segments(minutes=max(1, n // 10), seed=1)
+    return [normalize_text(s["text"]) for s in segs][:n]
+
+
+def _encode(model, texts, batch_size):
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+
+def _unit(m):
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sentences", type=int, default=2000)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    args = ap.parse_args()
+
+    texts = _sentences(args.sentences)
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, len(texts), size=(min(5000, len(texts) * 2), 2))
+
+    reference = _unit(_encode(load_embedding_model("torch"), texts, args.batch_size))
+    ref_pair = np.einsum("ij,ij->i", reference[pairs[:, 0]], reference[pairs[:, 1]])
+
+    print(f"{len(texts)} sentences, batch {args.batch_size}")
+    print(f"{'backend':>10} | {'sent/s':>8} | {'vec cos min':>11} {'mean':>7} | {'pair drift max':>14} {'mean':>7}")
+    for backend in args.backends:
+        model = load_embedding_model(backend)
+        _encode(model, texts[:args.batch_size], args.batch_size)  # warm-up
+        t0 = time.perf_counter()
+        emb = _unit(_encode(model, texts, args.batch_size))
+        rate = len(texts) / (time.perf_counter() - t0)
+
+        vec_cos = np.einsum("ij,ij->i", emb, reference)
+        pair = np.einsum("ij,ij->i", emb[pairs[:, 0]], emb[pairs[:, 1]])
+        drift = np.abs(pair - ref_pair)
+        print(
+            f"{backend:>10} | {rate:>8.0f} | {vec_cos.min():>11.4f} {vec_cos.mean():>7.4f} | "
+            f"{drift.max():>14.4f} {drift.mean():>7.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
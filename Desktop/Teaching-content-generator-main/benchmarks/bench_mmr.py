@@ -0,0 +1,40 @@
+"""
+Latency of the vectorized MMR re-ranker.
+
+    python -m benchmarks.bench_mmr [--candidates 1000] [--k 8 50] [--repeat 200]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services.mmr import mmr_select
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--candidates", type=int, default=1000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, nargs="+", default=[8, 50])
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    cand = rng.standard_normal((args.candidates, args.dim)).astype(np.float32)
+    q = rng.standard_normal(args.dim).astype(np.float32)
+
+    print(f"{'k':>4} {'candidates':>10} | {'p50 ms':>8} {'p95 ms':>8}")
+    for k in args.k:
+        runs = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            mmr_select(q, cand, k)
+            runs.append((time.perf_counter() - t0) * 1000)
+        runs.sort()
+        p95 = runs[int(0.95 * (len(runs) - 1))]
+        print(f"{k:>4} {args.candidates:>10} | {statistics.median(runs):>8.3f} {p95:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
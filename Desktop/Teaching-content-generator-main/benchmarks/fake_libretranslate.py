@@ -0,0 +1,86 @@
+"""
+Local fake LibreTranslate server (stdlib only) for tests and benchmarks.
+
+    python -m benchmarks.fake_libretranslate --port 5055 --latency 0.2 --fail-every 5
+    LT_URL=http://127.0.0.1:5055 python ...
+
+POST /translate {"q", "source", "target"} -> {"translatedText": "[<source>→<target>] <q>"}
+Every `fail_every`-th request answers 429 (with Retry-After) to exercise retries.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeLibreTranslate/1.0"
+
+    def do_POST(self):
+        srv = self.server
+        n = next(srv.counter)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if srv.latency:
+            time.sleep(srv.latency)
+        if self.path.rstrip("/") != "/translate":
+            return self._send(404, {"error": "not found"})
+        if srv.fail_every and n % srv.fail_every == srv.fail_every - 1:
+            return self._send(429, {"error": "slow down"}, {"Retry-After": "0"})
+        data = json.loads(body or b"{}")
+        srv.requests.append(data)
+        text = f"[{data.get('source', 'auto')}→{data.get('target', 'en')}] {data.get('q', '')}"
+        self._send(200, {"translatedText": text})
+
+    def _send(self, status, payload, headers=None):
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+
+def make_server(host="127.0.0.1", port=0, latency=0.0, fail_every=0):
+    srv = ThreadingHTTPServer((host, port), _Handler)
+    srv.latency = latency
+    srv.fail_every = fail_every
+    srv.counter = itertools.count()
+    srv.requests = []
+    return srv
+
+
+@contextlib.contextmanager
+def serve(latency=0.0, fail_every=0):
+    """Run the fake server on a free port in a background thread; yields (url, server)."""
+    srv = make_server(latency=latency, fail_every=fail_every)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield f"http://127.0.0.1:{srv.server_address[1]}", srv
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    ap.add_argument("--fail-every", type=int, default=0, help="answer 429 on every Nth request")
+    args = ap.parse_args()
+    srv = make_server(args.host, args.port, args.latency, args.fail_every)
+    print(f"fake LibreTranslate on http://{args.host}:{args.port}")
+    srv.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
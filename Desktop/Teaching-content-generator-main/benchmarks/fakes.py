@@ -0,0 +1,169 @@
+"""
+Deterministic local stand-ins for the external services, with configurable latency.
+
+  FakeGenAI          google.generativeai (GenerativeModel.generate_content, incl. stream=True)
+  FakePineconeIndex  pinecone Index (upsert / query / delete), exact cosine in NumPy
+  FakeEncoder        SentenceTransformer-like hashed bag-of-words encoder (no torch needed)
+  fake YouTube       synthetic segments for youtube._fetch_transcript_text
+  LibreTranslate     see benchmarks.fake_libretranslate (real HTTP server on localhost)
+
+install(...) patches them in and returns a function that undoes the patches.
+"""
+import hashlib
+import sys
+import time
+import types
+import zlib
+from typing import Callable, List
+
+import numpy as np
+
+from benchmarks.synthetic import transcript_segments
+
+
+# --- Gemini ---------------------------------------------------------------------------
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenAI(types.ModuleType):
+    """Module-shaped fake: echoes a slide deck derived from the prompt size."""
+
+    def __init__(self, latency=0.0, stream_chunks=8):
+        super().__init__("google.generativeai")
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        fake = self
+
+        class GenerativeModel:
+            def __init__(self, name):
+                self.name = name
+
+            def generate_content(self, prompt, stream=False):
+                digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+                text = "\n---\n".join(f"Slide {i + 1}: {digest}\n- point a\n- point b" for i in range(5))
+                if not stream:
+                    time.sleep(fake.latency)
+                    return _Response(text)
+                step = max(1, len(text) // fake.stream_chunks)
+
+                def gen():
+                    for i in range(0, len(text), step):
+                        time.sleep(fake.latency / fake.stream_chunks)
+                        yield _Response(text[i:i + step])
+                return gen()
+
+        self.GenerativeModel = GenerativeModel
+
+    def configure(self, **kwargs):
+        pass
+
+
+# --- Pinecone -------------------------------------------------------------------------
+class _Match(dict):
+    pass
+
+
+class FakePineconeIndex:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.namespaces = {}
+
+    def upsert(self, vectors, namespace):
+        time.sleep(self.latency)
+        ns = self.namespaces.setdefault(namespace, {})
+        for v in vectors:
+            ns[v["id"]] = (np.asarray(v["values"], dtype=np.float32), v.get("metadata") or {})
+
+    def query(self, vector, top_k, include_values, include_metadata, namespace):
+        time.sleep(self.latency)
+        ns = self.namespaces.get(namespace, {})
+        ids = list(ns)
+        if not ids:
+            return types.SimpleNamespace(matches=[])
+        mat = np.stack([ns[i][0] for i in ids])
+        q = np.asarray(vector, dtype=np.float32)
+        scores = (mat @ q) / (np.linalg.norm(mat, axis=1) * (np.linalg.norm(q) or 1.0))
+        order = np.argsort(-scores)[:top_k]
+        matches = []
+        for r in order:
+            m = _Match(id=ids[r], score=float(scores[r]))
+            if include_metadata:
+                m["metadata"] = ns[ids[r]][1]
+            if include_values:
+                m["values"] = ns[ids[r]][0].tolist()
+            matches.append(m)
+        return types.SimpleNamespace(matches=matches)
+
+    def delete(self, ids=None, delete_all=False, namespace=None):
+        time.sleep(self.latency)
+        if delete_all:
+            self.namespaces.pop(namespace, None)
+        else:
+            ns = self.namespaces.get(namespace, {})
+            for i in ids or []:
+                ns.pop(i, None)
+
+
+# --- Encoder --------------------------------------------------------------------------
+class FakeEncoder:
+    """Hashed bag-of-words, L2-normalized; costs O(words) like a (much) cheaper model."""
+
+    def __init__(self, dim=384, latency_per_text=0.0):
+        self.dim = dim
+        self.latency_per_text = latency_per_text
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        time.sleep(self.latency_per_text * len(texts))
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            for w in t.lower().split():
+                out[i, zlib.crc32(w.encode("utf-8")) % self.dim] += 1.0  # hash() is salted per process
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+# --- Install --------------------------------------------------------------------------
+def install(llm_latency=0.0, pinecone_latency=0.0, youtube_latency=0.0, fake_encoder=True, minutes=60) -> Callable[[], None]:
+    """Patch fakes into the app modules; returns an undo function."""
+    undo: List[Callable[[], None]] = []
+
+    def patch(obj, name, value):
+        old = getattr(obj, name)
+        setattr(obj, name, value)
+        undo.append(lambda: setattr(obj, name, old))
+
+    saved = {name: sys.modules.get(name) for name in ("google", "google.generativeai")}
+    if saved["google"] is None:
+        sys.modules["google"] = types.ModuleType("google")
+    sys.modules["google.generativeai"] = FakeGenAI(latency=llm_latency)
+    undo.append(lambda: [sys.modules.__setitem__(n, m) if m is not None else sys.modules.pop(n, None)
+                         for n, m in saved.items()])
+    from app.services import llm_service
+    patch(llm_service, "genai", sys.modules["google.generativeai"])
+
+    from app.services import pinecone_index
+    patch(pinecone_index, "_index", FakePineconeIndex(latency=pinecone_latency))
+
+    from app.services import youtube
+
+    def fake_fetch(video_id):
+        time.sleep(youtube_latency)
+        segments = youtube._normalize_segments(video_id, transcript_segments(minutes, seed=sum(map(ord, video_id))))
+        return {"video_id": video_id, "language": "en", "text": segments.text}, segments
+    patch(youtube, "_fetch_transcript_text", fake_fetch)
+
+    if fake_encoder:
+        from app.services import model_registry
+        encoder = FakeEncoder()
+        patch(model_registry, "get_embedding_model", lambda: encoder)
+
+    def restore():
+        for fn in reversed(undo):
+            fn()
+    return restore
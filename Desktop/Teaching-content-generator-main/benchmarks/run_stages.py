@@ -0,0 +1,165 @@
+"""
+Stage-level benchmark suite on synthetic transcripts (10 min, 1 h, 4 h).
+
+Times each pipeline stage with external services replaced by local fakes
+(benchmarks.fakes / benchmarks.fake_libretranslate), and reports throughput,
+p50/p95 latency and peak Python-heap memory (tracemalloc; includes NumPy buffers).
+
+    python -m benchmarks.run_stages [--sizes 10min 1h 4h] [--repeat 5] [--real-encoder]
+    python -m benchmarks.run_stages --compare OLD.json NEW.json
+
+Results are written as JSON to benchmarks/results/<git sha>-<timestamp>.json.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks import fakes
+from benchmarks.fake_libretranslate import serve
+from benchmarks.synthetic import SIZES, transcript_text
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _measure(fn, repeat, units):
+    """Run fn() `repeat` times; units = work items per run (for throughput)."""
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    times.sort()
+    p50 = statistics.median(times)
+    return {
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(times[math.ceil(0.95 * len(times)) - 1] * 1000, 3),  # nearest rank
+        "throughput_per_s": round(units / p50, 1) if p50 else None,
+        "units": units,
+        "peak_mem_mb": round(peak / 2**20, 2),
+    }
+
+
+def _git_sha():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def run(sizes, repeat, real_encoder, lt_latency, pc_latency, llm_latency):
+    import app.config as cfg
+
+    cfg.CACHE_PATH = tempfile.mkdtemp(prefix="bench-cache-")
+    cfg.TRANSLATION_CACHE_ENABLED = False  # measure the client, not the cache
+    restore = fakes.install(llm_latency=llm_latency, pinecone_latency=pc_latency, fake_encoder=not real_encoder)
+    try:
+        from app.services import chunker, embeddings, llm_service, pinecone_index, translate
+        from app.services.retrieval_index import RetrievalIndex
+
+        results = {}
+        with serve(latency=lt_latency) as (lt_url, _):
+            cfg.LT_URL = lt_url
+            for size in sizes:
+                text = transcript_text(SIZES[size])
+                clean = chunker.normalize_text(text)
+                chunks = chunker.make_chunks(clean)
+                texts = [c["text"] for c in chunks]
+                embedded = embeddings.embed_chunks(chunks, use_cache=False)
+                index = RetrievalIndex.from_embedded("bench", embedded)
+                queries = [f"question {i} about gradient descent" for i in range(16)]
+                q_vecs = embeddings.embed_texts(queries)
+                context = "\n".join(texts[:cfg.TOP_K])
+                stage = {}
+
+                stage["normalize_text"] = _measure(lambda: chunker.normalize_text(text), repeat, len(text))
+                stage["make_chunks"] = _measure(lambda: chunker.make_chunks(clean), repeat, len(clean))
+                stage["embed_texts"] = _measure(lambda: embeddings.embed_texts(texts), repeat, len(texts))
+                stage["retrieval_local"] = _measure(
+                    lambda: [index.search(q, cfg.TOP_K) for q in q_vecs], repeat, len(queries))
+                stage["pinecone_upsert"] = _measure(
+                    lambda: pinecone_index.upsert_chunks("bench", embedded), repeat, len(embedded))
+                stage["pinecone_query"] = _measure(
+                    lambda: [pinecone_index.query(q, "video:bench") for q in q_vecs], repeat, len(queries))
+                stage["translate_to_english"] = _measure(
+                    lambda: translate.translate_to_english(clean, source_lang="es"), max(1, repeat // 2), len(clean))
+                stage["prompt_assembly"] = _measure(
+                    lambda: llm_service._content_prompt("Gradient descent", "Slide 1: Intro", context), repeat, 1)
+
+                results[size] = {"chars": len(clean), "chunks": len(chunks), "stages": stage}
+                print(f"== {size}: {len(clean)} chars, {len(chunks)} chunks", file=sys.stderr)
+                for name, r in stage.items():
+                    print(f"  {name:<22} p50 {r['p50_ms']:>10.2f} ms  p95 {r['p95_ms']:>10.2f} ms  "
+                          f"{r['throughput_per_s'] or 0:>12.1f}/s  peak {r['peak_mem_mb']:>8.2f} MB", file=sys.stderr)
+        return results
+    finally:
+        restore()
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}")
+    for size, data in new["results"].items():
+        for name, r in data["stages"].items():
+            prev = old["results"].get(size, {}).get("stages", {}).get(name)
+            if not prev:
+                continue
+            delta = (r["p50_ms"] - prev["p50_ms"]) / prev["p50_ms"] * 100 if prev["p50_ms"] else 0.0
+            flag = "  REGRESSION" if delta > 10 else ""
+            print(f"  {size:>6} {name:<22} {prev['p50_ms']:>10.2f} -> {r['p50_ms']:>10.2f} ms ({delta:+6.1f}%){flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--real-encoder", action="store_true", help="use the configured SentenceTransformer")
+    ap.add_argument("--lt-latency", type=float, default=0.05, help="fake LibreTranslate seconds/request")
+    ap.add_argument("--pinecone-latency", type=float, default=0.005, help="fake Pinecone seconds/request")
+    ap.add_argument("--llm-latency", type=float, default=0.0, help="fake Gemini seconds/request")
+    ap.add_argument("--out", help="output JSON path (default: benchmarks/results/<sha>-<ts>.json)")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args.sizes, args.repeat, args.real_encoder, args.lt_latency, args.pinecone_latency, args.llm_latency)
+    report = {
+        "commit": _git_sha(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "params": vars(args),
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Deterministic synthetic lecture transcripts for benchmarks."""
+import random
+from typing import Dict, List
+
+_VOCAB = (
+    "the a we this that model data gradient loss function vector matrix learning rate "
+    "network layer input output training test error step update value example so now "
+    "let's look at how why when because then next first second we'll see here notice "
+    "basically right okay equation derivative sum product softmax attention token"
+).split()
+
+WORDS_PER_MINUTE = 150  # typical lecture speaking rate
+
+
+def transcript_segments(minutes: float, seed: int = 0) -> List[Dict]:
+    """YouTube-style segments ({"text", "start", "duration"}) of about `minutes` of speech."""
+    rng = random.Random(seed)
+    total_words = int(minutes * WORDS_PER_MINUTE)
+    segments: List[Dict] = []
+    t = 0.0
+    words = 0
+    while words < total_words:
+        n = rng.randint(6, 14)
+        text = " ".join(rng.choice(_VOCAB) for _ in range(n))
+        if rng.random() < 0.35:
+            text += rng.choice(".?!")
+        duration = n * 60.0 / WORDS_PER_MINUTE
+        segments.append({"text": text, "start": round(t, 2), "duration": round(duration, 2)})
+        t += duration
+        words += n
+    return segments
+
+
+def transcript_text(minutes: float, seed: int = 0) -> str:
+    return " ".join(s["text"] for s in transcript_segments(minutes, seed=seed))
+
+
+# Standard sizes used across the benchmark scripts
+SIZES = {"10min": 10, "1h": 60, "4h": 240}
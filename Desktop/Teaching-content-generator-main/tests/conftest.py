@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Import the `app` package from the project root, and keep every on-disk cache
+# (CACHE_PATH is read when app.config is first imported) out of the working tree.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("CACHE_PATH", tempfile.mkdtemp(prefix="tcg-tests-"))
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A fresh interpreter started in the project root (no PYTHONPATH, no sys.path edits)
+# spawns a worker the way embed_pool does and imports what _init_worker imports.
+SCRIPT = """
+import importlib, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from app.services import embed_pool
+
+if __name__ == "__main__":
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, mp_context=ctx, initializer=importlib.import_module,
+                             initargs=("app.services.model_registry",)) as pool:
+        print(pool.submit(embed_pool.pool_size).result(timeout=60))
+"""
+
+
+def test_spawned_worker_imports_without_path_tweaks(tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONPATH"}
+    env["CACHE_PATH"] = str(tmp_path)
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert out.returncode == 0, out.stderr
+    assert int(out.stdout.strip()) >= 1
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from app.services import embed_pool, embeddings, model_registry
+from benchmarks.fakes import FakeEncoder
+
+
+def _texts(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(f"w{i}x{j}" for j in range(int(rng.integers(1, 60)))) for i in range(n)]
+
+
+@pytest.mark.parametrize("max_batch,token_budget", [(1, 10_000), (8, 10_000), (64, 200), (5, 1)])
+def test_adaptive_batches_cover_each_index_once_within_limits(max_batch, token_budget):
+    texts = _texts(100)
+    batches = embeddings._adaptive_batches(texts, max_batch, token_budget)
+
+    assert sorted(i for b in batches for i in b) == list(range(len(texts)))
+    for b in batches:
+        assert 1 <= len(b) <= max_batch
+        longest = max(len(texts[i]) // 4 + 1 for i in b)
+        assert len(b) == 1 or len(b) * longest <= token_budget  # a lone over-budget text still gets a batch
+
+
+def test_adaptive_batches_group_by_length():
+    texts = _texts(100)
+    batches = embeddings._adaptive_batches(texts, 10, 10_000)
+    lengths = [[len(texts[i]) for i in b] for b in batches]
+    assert all(max(a) <= min(b) for a, b in zip(lengths, lengths[1:]))
+
+
+def test_embed_texts_rows_follow_input_order(monkeypatch):
+    encoder = FakeEncoder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda: encoder)
+    monkeypatch.setattr(embed_pool, "should_use", lambda n: False)
+    texts = _texts(50, seed=1)  # lengths shuffled, so batches are out of input order
+
+    out = embeddings.embed_texts(texts, batch_size=4)
+    assert out.shape == (len(texts), encoder.dim) and out.dtype == np.float32
+    np.testing.assert_allclose(out, encoder.encode(texts), rtol=1e-6)
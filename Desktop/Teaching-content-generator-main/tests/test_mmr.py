@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.services.mmr import mmr_select
+
+
+def naive_mmr(query, candidates, k, lambda_mult, relevance=None):
+    """Textbook MMR with explicit pairwise loops (float64), the reference for mmr_select."""
+    cand = [c / (np.linalg.norm(c) or 1.0) for c in np.asarray(candidates, dtype=np.float64)]
+    q = np.asarray(query, dtype=np.float64)
+    q = q / (np.linalg.norm(q) or 1.0)
+    if relevance is None:
+        rel = [float(c @ q) for c in cand]
+    else:
+        top = max(abs(float(r)) for r in relevance) or 1.0
+        rel = [float(r) / top for r in relevance]
+
+    picked = []
+    while len(picked) < min(k, len(cand)):
+        best, best_score = None, -np.inf
+        for i in range(len(cand)):
+            if i in picked:
+                continue
+            redundancy = max((float(cand[i] @ cand[j]) for j in picked), default=0.0)
+            score = lambda_mult * rel[i] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        picked.append(best)
+    return picked
+
+
+@pytest.mark.parametrize("lambda_mult", [0.0, 0.3, 0.5, 0.7, 1.0])
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_naive_reference(seed, lambda_mult):
+    rng = np.random.default_rng(seed)
+    query = rng.standard_normal(16)
+    candidates = rng.standard_normal((60, 16))
+    assert mmr_select(query, candidates, 10, lambda_mult).tolist() == naive_mmr(query, candidates, 10, lambda_mult)
+
+
+def test_matches_naive_reference_with_given_relevance():
+    rng = np.random.default_rng(7)
+    query = rng.standard_normal(16)
+    candidates = rng.standard_normal((40, 16))
+    relevance = rng.random(40) * 0.03  # e.g. RRF scores
+    got = mmr_select(query, candidates, 8, 0.6, relevance=relevance).tolist()
+    assert got == naive_mmr(query, candidates, 8, 0.6, relevance=relevance)
+
+
+def test_edge_cases():
+    rng = np.random.default_rng(0)
+    candidates = rng.standard_normal((3, 4))
+    assert sorted(mmr_select(rng.standard_normal(4), candidates, 10).tolist()) == [0, 1, 2]  # k > n
+    assert mmr_select(rng.standard_normal(4), candidates, 0).size == 0
+    # lambda = 1 is plain relevance ranking
+    q = rng.standard_normal(4)
+    order = np.argsort(-(candidates / np.linalg.norm(candidates, axis=1, keepdims=True)) @ (q / np.linalg.norm(q)))
+    assert mmr_select(q, candidates, 3, 1.0).tolist() == order.tolist()
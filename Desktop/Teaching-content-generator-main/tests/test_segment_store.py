@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.segment_store import SegmentStore
+
+SEGMENTS = [
+    {"text": "héllo wörld", "start": 0.0, "duration": 10.0},  # long caption overlapping the next two
+    {"text": "short", "start": 1.0, "duration": 1.0},
+    {"text": "third ✓", "start": 5.0, "duration": 2.0},
+    {"text": "last", "start": 12.0, "duration": 1.0},
+]
+
+
+def test_slice_with_overlapping_captions():
+    segs = SegmentStore.from_segments("vid", SEGMENTS)
+    assert segs.slice(3.0, 4.0) == "héllo wörld short"
+    assert segs.slice(8.0, 9.0) == "héllo wörld short third ✓"
+    assert segs.slice(10.5, 11.0) == ""
+    assert segs.slice(12.5, 20.0) == "last"
+    assert segs.duration == 13.0
+
+
+def test_save_load_roundtrip_and_legacy_files(tmp_path):
+    segs = SegmentStore.from_segments("vid", SEGMENTS)
+    path = str(tmp_path / "vid.npz")
+    segs.save(path)
+    loaded = SegmentStore.load(path)
+    assert loaded.text == segs.text
+    np.testing.assert_array_equal(loaded.offsets, segs.offsets)
+
+    # files written before the text was stored as UTF-8 bytes
+    np.savez(path, video_id=np.array("vid"), text=np.array(segs.text),
+             offsets=segs.offsets, starts=segs.starts, durations=segs.durations)
+    assert SegmentStore.load(path).text == segs.text
@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks import fakes
+
+
+@pytest.fixture(scope="module")
+def parse_plan_items():
+    undo = fakes.install()  # llm_service needs google.generativeai, which tests replace
+    from app.services.slide_generator import parse_plan_items
+    yield parse_plan_items
+    undo()
+
+
+def test_numbered_key_points_stay_inside_slide_headings(parse_plan_items):
+    plan = (
+        "**Slide 1: Gradient descent**\nKey points:\n1. Learning rate\n2. Convergence\n\n"
+        "**Slide 2: Momentum**\n1. Velocity term\n2. Damping"
+    )
+    assert parse_plan_items(plan) == [
+        {"title": "Gradient descent", "description": "Key points:\n1. Learning rate\n2. Convergence"},
+        {"title": "Momentum", "description": "1. Velocity term\n2. Damping"},
+    ]
+
+
+def test_markdown_headings_take_precedence_over_numbers(parse_plan_items):
+    plan = "## Intro\n1. Why it matters\n## Method\n2) Steps"
+    assert [i["title"] for i in parse_plan_items(plan)] == ["Intro", "Method"]
+    assert parse_plan_items(plan)[0]["description"] == "1. Why it matters"
+
+
+def test_numbered_lines_are_headings_without_other_headings(parse_plan_items):
+    plan = "1. Intro\nwhat we cover\n2) Loss functions\n3. Summary"
+    assert parse_plan_items(plan) == [
+        {"title": "Intro", "description": "what we cover"},
+        {"title": "Loss functions", "description": ""},
+        {"title": "Summary", "description": ""},
+    ]
+
+
+def test_list_and_plain_text_plans(parse_plan_items):
+    assert parse_plan_items([{"title": "A", "description": "x"}, "B", {"title": ""}]) == [
+        {"title": "A", "description": "x"},
+        {"title": "B", "description": ""},
+    ]
+    assert parse_plan_items("Intro\nOutro") == [
+        {"title": "Intro", "description": ""},
+        {"title": "Outro", "description": ""},
+    ]
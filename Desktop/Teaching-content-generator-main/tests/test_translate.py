@@ -0,0 +1,72 @@
+import contextlib
+
+import pytest
+import requests
+
+import app.config as cfg
+from app.services import translate
+from app.services.disk_cache import DiskCache
+from benchmarks.fake_libretranslate import serve
+
+
+@pytest.fixture
+def lt(monkeypatch, tmp_path):
+    """Fake LibreTranslate factory; no real sleeping, fresh cache per test."""
+    sleeps = []
+    monkeypatch.setattr(translate.time, "sleep", sleeps.append)
+    monkeypatch.setattr(translate, "_cache", DiskCache(str(tmp_path / "translations")))
+    monkeypatch.setattr(cfg, "TRANSLATION_CACHE_ENABLED", True)
+    monkeypatch.setattr(cfg, "LT_MAX_RETRIES", 3)
+    monkeypatch.setattr(cfg, "LT_API_KEY", "")
+
+    with contextlib.ExitStack() as stack:
+        def start(fail_every=0):
+            url, srv = stack.enter_context(serve(fail_every=fail_every))
+            monkeypatch.setattr(cfg, "LT_URL", url)
+            return srv
+
+        start.sleeps = sleeps
+        yield start
+
+
+def test_translates_and_caches(lt):
+    srv = lt()
+    assert translate.translate_to_english("hola mundo", "es") == "[es→en] hola mundo"
+    assert translate.translate_to_english("hola mundo", "es") == "[es→en] hola mundo"
+    assert len(srv.requests) == 1  # second call served from the cache
+    translate.translate_to_english("hola mundo", "pt")
+    assert len(srv.requests) == 2  # cache key includes the source language
+
+
+def test_long_text_pieces_keep_order(lt):
+    srv = lt()
+    words = [f"w{i}" for i in range(3000)]
+    out = translate.translate_to_english(" ".join(words), "es")
+    assert len(srv.requests) > 1
+    assert [w for w in out.split() if w.startswith("w")] == words
+
+
+def test_retries_429_honouring_retry_after(lt):
+    srv = lt(fail_every=2)  # every 2nd request: 429 with Retry-After: 0
+    results = [translate.translate_to_english(f"texto {i}", "es") for i in range(3)]
+    assert results == [f"[es→en] texto {i}" for i in range(3)]
+    assert next(srv.counter) == 5  # requests 0..4: two of them were 429s
+    assert lt.sleeps == [0.0, 0.0]  # waited exactly Retry-After each time
+
+
+def test_gives_up_after_max_retries(lt):
+    srv = lt(fail_every=1)  # always 429
+    with pytest.raises(requests.HTTPError):
+        translate.translate_to_english("texto", "es")
+    assert next(srv.counter) == cfg.LT_MAX_RETRIES + 1
+    assert len(lt.sleeps) == cfg.LT_MAX_RETRIES
+
+
+def test_backoff(monkeypatch):
+    monkeypatch.setattr(cfg, "LT_BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(cfg, "LT_BACKOFF_MAX", 4.0)
+    assert translate._backoff(0, "2.5") == 2.5
+    assert translate._backoff(0, "120") == 4.0  # Retry-After is capped too
+    for attempt, ceiling in ((0, 0.5), (1, 1.0), (2, 2.0), (5, 4.0)):
+        delay = translate._backoff(attempt, "soon")  # unparseable header: exponential + jitter
+        assert ceiling / 2 <= delay <= ceiling
@@ -0,0 +1,151 @@
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+import app.config as cfg
+from app.services import mmr, pinecone_index
+from app.services.embedded import EmbeddedChunks, as_embedded
+from app.services.vector_store import EMBED_DIM, LocalVectorStore, VectorStore, video_namespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _chunks(ids, seed=0):
+    rng = np.random.default_rng(seed)
+    return EmbeddedChunks(list(ids), [f"text {i}" for i in ids], rng.standard_normal((len(ids), EMBED_DIM)))
+
+
+def _generations(directory):
+    return {name.split("-", 1)[1].split(".")[0] for name in os.listdir(directory) if name.startswith("vectors-")}
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        VectorStore()
+
+
+def test_upsert_query_delete_roundtrip(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    chunks = _chunks(["a", "b", "c"])
+    assert store.upsert_chunks("vid", chunks) == 3
+
+    top = store.query(chunks.vectors[1], video_namespace("vid"), top_k=2)
+    assert top[0]["id"] == "b" and top[0]["text"] == "text b"
+    assert top[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+    # overwrite by id, not append
+    store.upsert_chunks("vid", EmbeddedChunks(["b"], ["new b"], chunks.vectors[2:3]))
+    assert store.query(chunks.vectors[2], video_namespace("vid"), top_k=3)[1]["text"] == "new b"
+
+    assert store.delete_ids("vid", ["a", "zzz"]) == 1
+    assert [m["id"] for m in store.query(chunks.vectors[0], video_namespace("vid"), top_k=5)] != []
+    assert "a" not in {m["id"] for m in store.query(chunks.vectors[0], video_namespace("vid"), top_k=5)}
+
+    store.delete_by_video("vid")
+    assert store.query(chunks.vectors[0], video_namespace("vid")) == []
+
+
+def test_empty_legacy_list_upserts_nothing(tmp_path):
+    assert as_embedded([], EMBED_DIM).vectors.shape == (0, EMBED_DIM)
+    assert LocalVectorStore(str(tmp_path)).upsert_chunks("vid", []) == 0
+    assert pinecone_index.upsert_chunks("vid", []) == 0  # returns before any client call
+
+
+def test_repeated_id_in_one_batch_keeps_last_row(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    chunks = _chunks(["a", "b", "a"])
+    assert store.upsert_chunks("vid", EmbeddedChunks(chunks.ids, ["a1", "b", "a2"], chunks.vectors)) == 2
+
+    snap = store._snapshot(video_namespace("vid"))
+    assert dict(zip(snap.ids, snap.texts)) == {"a": "a2", "b": "b"}
+    top = store.query(chunks.vectors[2], video_namespace("vid"), top_k=1)[0]
+    assert top["id"] == "a" and top["score"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_concurrent_writer_threads_lose_no_updates(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+
+    def write(tag):
+        for i in range(10):
+            store.upsert_chunks("vid", _chunks([f"{tag}-{i}"], seed=i))
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in "pqr"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store._snapshot(video_namespace("vid")).ids) == 30
+
+
+def test_query_many_matches_single_queries(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    chunks = _chunks([f"c{i}" for i in range(50)])
+    store.upsert_chunks("vid", chunks)
+    many = store.query_many(chunks.vectors[:4], video_namespace("vid"), top_k=5)
+    for q, matches in zip(chunks.vectors[:4], many):
+        assert [m["id"] for m in matches] == [m["id"] for m in store.query(q, video_namespace("vid"), top_k=5)]
+
+
+def test_query_applies_mmr_when_enabled(tmp_path, monkeypatch):
+    store = LocalVectorStore(str(tmp_path))
+    basis = np.eye(EMBED_DIM, dtype=np.float32)
+    q = basis[0]
+    a = 0.9 * basis[0] + 0.436 * basis[1]
+    vectors = np.stack([a, a + 0.05 * basis[2], 0.8 * basis[0] + 0.6 * basis[2], basis[5], basis[6]])
+    store.upsert_chunks("vid", EmbeddedChunks(["a", "a2", "b", "x", "y"], list("abcde"), vectors))
+    ns = video_namespace("vid")
+
+    monkeypatch.setattr(cfg, "USE_MMR", False)
+    assert [m["id"] for m in store.query(q, ns, top_k=2)] == ["a", "a2"]
+
+    monkeypatch.setattr(cfg, "USE_MMR", True)
+    picked = store.query(q, ns, top_k=2)
+    assert [m["id"] for m in picked] == ["a", "b"]  # the near-duplicate of "a" is skipped
+    assert "vector" not in picked[0] and picked[0]["text"] == "a"
+
+    # same result as MMR over the candidates the plain query returns with their vectors
+    cands = store.query(q, ns, top_k=mmr.fetch_k(2), include_values=True, use_mmr=False)
+    rows = mmr.mmr_select(q, np.stack([m["vector"] for m in cands]), 2, cfg.MMR_LAMBDA)
+    assert [cands[r]["id"] for r in rows] == ["a", "b"]
+
+
+def test_reopen_sees_published_data(tmp_path):
+    LocalVectorStore(str(tmp_path)).upsert_chunks("vid", _chunks(["a", "b"]))
+    other = LocalVectorStore(str(tmp_path))
+    assert {m["id"] for m in other.query(_chunks(["a"]).vectors[0], video_namespace("vid"))} == {"a", "b"}
+
+
+def test_publish_keeps_previous_generation(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    ns_dir = os.path.join(str(tmp_path), "video_vid")
+    store.upsert_chunks("vid", _chunks(["a"]))
+    snap = store._snapshot(video_namespace("vid"))
+    store.upsert_chunks("vid", _chunks(["b"], seed=1))
+    # a reader holding the old generation can still use it
+    assert snap.name in _generations(ns_dir)
+    assert len(snap.ids) == np.asarray(snap.matrix).shape[0] == 1
+    store.upsert_chunks("vid", _chunks(["c"], seed=2))
+    assert snap.name not in _generations(ns_dir)
+    assert len(_generations(ns_dir)) == 2
+
+
+def test_concurrent_writer_processes_lose_no_updates(tmp_path):
+    script = (
+        "import sys, numpy as np\n"
+        "from app.services.embedded import EmbeddedChunks\n"
+        "from app.services.vector_store import EMBED_DIM, LocalVectorStore\n"
+        "store = LocalVectorStore(sys.argv[1])\n"
+        "for i in range(15):\n"
+        "    cid = f'{sys.argv[2]}-{i}'\n"
+        "    store.upsert_chunks('vid', EmbeddedChunks([cid], [cid], np.ones((1, EMBED_DIM))))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    procs = [subprocess.Popen([sys.executable, "-c", script, str(tmp_path), tag], env=env) for tag in ("p", "q")]
+    assert all(p.wait(timeout=120) == 0 for p in procs)
+
+    ids = LocalVectorStore(str(tmp_path))._snapshot(video_namespace("vid")).ids
+    assert sorted(ids) == sorted(f"{t}-{i}" for t in ("p", "q") for i in range(15))